@@ -1,17 +1,109 @@
-from typing import Any, Dict, List
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional
 import os
+import threading
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse
 from pydantic import BaseModel
 
+from config import config
+from pipeline.admission import (
+    AdmissionRejected,
+    RequestTooLarge,
+    admission,
+    check_input_size,
+    llm_limiter,
+)
+from pipeline.circuit_breaker import CircuitBreaker
+from pipeline.extractor import extractor
+from pipeline.llm import llm
 from pipeline.processor import processor
+from serialization import CompressionMiddleware, FastJSONResponse
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Warm up in the background so the server starts accepting connections at once."""
+    if config.WARMUP_ON_STARTUP:
+        threading.Thread(
+            target=processor.warm_up,
+            args=(config.WARMUP_CONNECT,),
+            name="warm-up",
+            daemon=True,
+        ).start()
+    else:
+        processor.ready.set()
+    yield
+
+
+class BodySizeLimitMiddleware:
+    """
+    Rejects a request body over its endpoint's limit with 413 before it
+    is read and parsed: at once when Content-Length is over the limit,
+    otherwise as soon as the bytes received go over it.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        limit = _body_limit(scope["path"]) if scope["type"] == "http" else None
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        rejection = RequestTooLarge("body_too_large", f"Request body is over the {limit} byte limit")
+        for key, value in scope.get("headers", []):
+            if key == b"content-length":
+                if value.isdigit() and int(value) > limit:
+                    await _rejection_response(rejection)(scope, receive, send)
+                    return
+                break
+
+        received = 0
+        too_large = False
+
+        async def limited_receive():
+            nonlocal received, too_large
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    too_large = True
+                    raise rejection
+            return message
+
+        async def guarded_send(message):
+            # The app answers the aborted read with its own error; send the 413 instead
+            if not too_large:
+                await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except RequestTooLarge as e:
+            if e is not rejection:
+                raise
+        if too_large:
+            await _rejection_response(rejection)(scope, receive, send)
+
+
+def _body_limit(path: str) -> Optional[int]:
+    """Raw body limit in bytes for an endpoint, or None if it has none."""
+    if path == "/process-text":
+        return config.MAX_BODY_BYTES
+    if path == "/process-texts":
+        return config.MAX_BATCH_BODY_BYTES
+    return None
+
 
 app = FastAPI(
     title="Shorol-Order AI Text Processor",
     description="Text-only AI pipeline for order extraction",
     version="1.0.0",
+    default_response_class=FastJSONResponse,
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -21,12 +113,28 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(CompressionMiddleware, minimum_size=config.COMPRESSION_MIN_BYTES)
+app.add_middleware(BodySizeLimitMiddleware)
 
 
 class ProcessTextRequest(BaseModel):
     """Request model for text processing."""
 
     text: str
+    session_token: Optional[str] = None
+
+
+class BatchMessage(BaseModel):
+    """One message in a batch request."""
+
+    id: str
+    text: str
+
+
+class ProcessTextsRequest(BaseModel):
+    """Request model for batch text processing."""
+
+    messages: List[BatchMessage]
 
 
 class ProcessTextResponse(BaseModel):
@@ -37,9 +145,31 @@ class ProcessTextResponse(BaseModel):
     processing_time_seconds: float
     retry_count: int
     blocks_processed: int
+    llm_calls: int = 0
     needs_review: bool
-    errors: List[str] = []
+    degraded: bool = False
+    errors: Optional[List[str]] = None
     debug: Dict[str, Any]
+    session: Optional[Dict[str, Any]] = None
+
+
+class BatchItemResponse(BaseModel):
+    """Result for one message of a batch: a result, or the error that rejected it."""
+
+    id: str
+    result: Optional[ProcessTextResponse] = None
+    error: Optional[str] = None
+
+
+class ProcessTextsResponse(BaseModel):
+    """Response model for batch text processing."""
+
+    results: List[BatchItemResponse]
+    messages_processed: int
+    blocks_processed: int
+    unique_blocks: int
+    processing_time: str
+    processing_time_seconds: float
 
 
 @app.get("/", response_class=HTMLResponse)
@@ -62,37 +192,140 @@ async def root():
         """
 
 
+def _error_content(message: str) -> Dict[str, Any]:
+    """Response body for a failed request, shaped like ProcessTextResponse."""
+    return {
+        "error": message,
+        "results": {"orders": []},
+        "processing_time": "0s",
+        "processing_time_seconds": 0.0,
+        "retry_count": 0,
+        "blocks_processed": 0,
+        "llm_calls": 0,
+        "needs_review": True,
+        "degraded": False,
+        "errors": [message],
+        "debug": {
+            "raw_ai_extraction_output": [],
+            "after_auto_fix": [],
+            "final_validated_result": [],
+        },
+    }
+
+
+def _rejection_response(rejection: AdmissionRejected) -> FastJSONResponse:
+    """Fast response for a shed request."""
+    admission.record_shed(rejection.reason)
+    headers = {}
+    if rejection.retry_after is not None:
+        headers["Retry-After"] = str(rejection.retry_after)
+    return FastJSONResponse(
+        status_code=rejection.status_code,
+        content=_error_content(rejection.detail),
+        headers=headers,
+    )
+
+
+def _client_id(http_request: Request) -> str:
+    """
+    Identify the caller for fair queuing: the peer address, or the
+    X-Client-ID header when TRUST_CLIENT_ID_HEADER is set. Callers
+    choose the header freely, so trusting it from the open internet
+    would let a client take any number of queue slots.
+    """
+    if config.TRUST_CLIENT_ID_HEADER:
+        client_id = http_request.headers.get("x-client-id")
+        if client_id:
+            return client_id
+    return http_request.client.host if http_request.client else "anonymous"
+
+
 @app.post("/process-text", response_model=ProcessTextResponse)
-async def process_text(request: ProcessTextRequest):
+async def process_text(request: ProcessTextRequest, http_request: Request):
     """Process raw text through AI extraction pipeline."""
     try:
-        result = processor.process_text(request.text)
-        return JSONResponse(content=result)
+        admission.check_input(request.text)
+        await admission.acquire(_client_id(http_request))
+    except AdmissionRejected as e:
+        return _rejection_response(e)
+
+    try:
+        result = await run_in_threadpool(
+            processor.process_text,
+            request.text,
+            config.MAX_BLOCKS_PER_REQUEST,
+            request.session_token,
+        )
+        return FastJSONResponse(content=result)
+    except AdmissionRejected as e:
+        return _rejection_response(e)
     except Exception as e:
-        return JSONResponse(
-            status_code=500,
-            content={
-                "error": str(e),
-                "results": {"orders": []},
-                "processing_time": "0s",
-                "processing_time_seconds": 0.0,
-                "retry_count": 0,
-                "blocks_processed": 0,
-                "needs_review": True,
-                "errors": [str(e)],
-                "debug": {
-                    "raw_ai_extraction_output": [],
-                    "after_auto_fix": [],
-                    "final_validated_result": [],
-                },
-            },
+        return FastJSONResponse(status_code=500, content=_error_content(str(e)))
+    finally:
+        admission.release()
+
+
+@app.post("/process-texts", response_model=ProcessTextsResponse)
+async def process_texts(request: ProcessTextsRequest, http_request: Request):
+    """Process many independent messages through one shared scheduler."""
+    try:
+        if len(request.messages) > config.MAX_MESSAGES_PER_BATCH:
+            raise RequestTooLarge(
+                "too_many_messages",
+                f"Batch has {len(request.messages)} messages, limit is {config.MAX_MESSAGES_PER_BATCH}",
+            )
+        check_input_size(
+            "".join(message.text for message in request.messages),
+            config.MAX_BATCH_INPUT_BYTES,
+        )
+        await admission.acquire(_client_id(http_request))
+    except AdmissionRejected as e:
+        return _rejection_response(e)
+
+    try:
+        result = await run_in_threadpool(
+            processor.process_texts,
+            [(message.id, message.text) for message in request.messages],
+            config.MAX_BLOCKS_PER_REQUEST,
+            config.MAX_INPUT_BYTES,
+            config.MAX_BLOCKS_PER_BATCH,
         )
+        return FastJSONResponse(content=result)
+    except AdmissionRejected as e:
+        return _rejection_response(e)
+    except Exception as e:
+        return FastJSONResponse(status_code=500, content={"error": str(e), "results": []})
+    finally:
+        admission.release()
 
 
 @app.get("/health")
 async def health_check():
-    """Health check endpoint."""
-    return {"status": "ok", "service": "ai-text-processor"}
+    """Health check endpoint. Reports "degraded" while the LLM circuit is not closed."""
+    breaker = llm.breaker.stats()
+    return {
+        "status": "ok" if breaker["state"] == CircuitBreaker.CLOSED else "degraded",
+        "service": "ai-text-processor",
+        "llm_circuit": breaker,
+    }
+
+
+@app.get("/ready")
+async def ready_check():
+    """Readiness probe: 200 once warm-up has finished, 503 before."""
+    if not processor.ready.is_set():
+        return FastJSONResponse(status_code=503, content={"ready": False})
+    return {"ready": True, "warm_up_seconds": processor.warm_up_seconds}
+
+
+@app.get("/metrics")
+async def metrics():
+    """Admission, LLM concurrency and extraction batching counters for monitoring."""
+    return {
+        "admission": admission.stats(),
+        "llm": llm_limiter.stats(),
+        "extract_batching": extractor.batcher.stats(),
+    }
 
 
 if __name__ == "__main__":
@@ -0,0 +1 @@
+# Benchmarks for the AI text processing pipeline
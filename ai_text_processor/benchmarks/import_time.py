@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Import-time budget for cold starts.
+
+Imports each module in a fresh interpreter several times and compares
+the median wall time with its budget. Also checks that heavy modules
+(openai) stay out of the import path. Exits non-zero when over budget.
+
+Usage:
+    python benchmarks/import_time.py
+    IMPORT_BUDGET_SCALE=2 python benchmarks/import_time.py   # slow machines
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Median seconds for `python -c "import <module>"`, interpreter start-up included
+BUDGETS = {
+    "pipeline.processor": 0.35,
+    "app": 0.75,
+}
+
+# Modules that must only be imported on first use
+DEFERRED_MODULES = ("openai",)
+
+RUNS = 5
+
+
+def import_seconds(module: str) -> float:
+    timings = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", f"import {module}"], cwd=ROOT, check=True)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def deferred_imports(module: str) -> list:
+    code = (
+        f"import sys, {module}; "
+        f"print(','.join(m for m in {DEFERRED_MODULES!r} if m in sys.modules))"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT, check=True, capture_output=True, text=True
+    ).stdout.strip()
+    return [name for name in output.split(",") if name]
+
+
+def main() -> int:
+    scale = float(os.getenv("IMPORT_BUDGET_SCALE", "1"))
+    failed = False
+    for module, budget in BUDGETS.items():
+        seconds = import_seconds(module)
+        leaked = deferred_imports(module)
+        ok = seconds <= budget * scale and not leaked
+        failed = failed or not ok
+        status = "ok" if ok else "OVER BUDGET"
+        print(f"{module:<22}{seconds * 1000:>7.0f} ms  (budget {budget * scale * 1000:.0f} ms)  {status}")
+        if leaked:
+            print(f"  eagerly imported: {', '.join(leaked)}")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
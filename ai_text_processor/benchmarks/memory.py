@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Peak memory of pipeline results per 1,000 orders.
+
+Runs 1,000 one-order blocks through process_blocks with a stub LLM whose
+answers need the auto-fixer (+88 phone, quantity left in the item), then
+measures with tracemalloc the peak, and what is still allocated when the
+scenario returns (retained):
+
+- results: the ProcessingResult list kept after process_blocks
+- response: process_blocks + build_response (one /process-text answer)
+- cli: the bulk CLI writing the same blocks as 100 records of 10 blocks
+
+Usage:
+    python benchmarks/memory.py
+"""
+
+import io
+import json
+import os
+import re
+import sys
+import tracemalloc
+from typing import Any, Callable, Dict, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.pop("OPENAI_API_KEY", None)
+
+from cli import process_chunk
+from pipeline.fake_llm import fake_client
+from pipeline.llm import llm
+from pipeline.processor import processor
+
+ORDER_COUNT = 1000
+BLOCKS_PER_RECORD = 10
+
+
+def _reply(messages: List[Dict[str, str]], **params: Any) -> str:
+    """Stub reply: one order per block, with a phone and quantity for the fixer to repair."""
+    block = messages[-1]["content"]
+    customer = re.search(r"Customer \d+", block).group(0)
+    phone = re.search(r"017\d{8}", block).group(0)
+    return json.dumps({
+        "orders": [
+            {
+                "customer_name": customer,
+                "phone": "+88" + phone,
+                "address": "Mirpur 10, road 5",
+                "item": "black shirt 2pc",
+                "quantity": None,
+                "notes": None,
+            }
+        ]
+    })
+
+
+def make_blocks(count: int = ORDER_COUNT) -> List[str]:
+    return [f"Customer {i} 017{i:08d}\nMirpur 10, road 5\nblack shirt 2pc" for i in range(count)]
+
+
+def peak_kb(func: Callable[[], Any]) -> Tuple[float, float]:
+    """(peak, retained) in KB for running func, retained being what its result still holds."""
+    tracemalloc.start()
+    try:
+        result = func()
+        current, peak = tracemalloc.get_traced_memory()
+        del result
+        return peak / 1024, current / 1024
+    finally:
+        tracemalloc.stop()
+
+
+def write_cli_rows(blocks: List[str]) -> int:
+    chunk = [
+        (index, f"r{index}", blocks[start:start + BLOCKS_PER_RECORD], None)
+        for index, start in enumerate(range(0, len(blocks), BLOCKS_PER_RECORD))
+    ]
+    out = io.BytesIO()
+    for row in process_chunk(processor, chunk):
+        out.write((json.dumps(row, ensure_ascii=False) + "\n").encode('utf-8'))
+    return out.tell()
+
+
+def main() -> None:
+    llm.client = fake_client(_reply)
+    blocks = make_blocks()
+    # Start the executor and load prompts outside the measurement
+    processor.process_blocks(blocks[:2])
+
+    scenarios = {
+        "results": lambda: processor.process_blocks(blocks),
+        "response": lambda: processor.build_response(blocks, processor.process_blocks(blocks), 0.0),
+        "cli": lambda: write_cli_rows(blocks),
+    }
+
+    print(f"{ORDER_COUNT} orders")
+    print(f"{'scenario':<12}{'peak KB':>10}{'retained KB':>13}")
+    for name, func in scenarios.items():
+        peak, retained = peak_kb(func)
+        print(f"{name:<12}{peak:>10.0f}{retained:>13.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Pathological-input performance checks for the deterministic stages.
+
+Chat text is untrusted, so every stage that runs before (or instead of)
+the LLM must stay linear on adversarial input: megabyte-long lines,
+long digit runs, thousands of phone-like numbers, emoji/ZWJ sequences,
+Bengali/Latin punctuation storms. For each generator (and for seeded
+fuzz inputs) this times each stage at growing 4x sizes (best of a few
+runs), the time per MB and the tracemalloc peak per MB, and compares
+them with the budgets below. Failures are printed with the cProfile hotspots of the
+slow call. Exits non-zero when a check fails.
+
+Usage:
+    python benchmarks/pathological.py
+    python benchmarks/pathological.py --size 250000 --fuzz 50
+    PERF_BUDGET_SCALE=2 python benchmarks/pathological.py   # slow machines
+"""
+
+import argparse
+import cProfile
+import io
+import os
+import pstats
+import random
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pipeline.batch_splitter import BatchSplitter
+from pipeline.cleaner import TextCleaner
+from pipeline.fixer import AutoFixer
+from pipeline.rules import RuleExtractor
+from pipeline.segmenter import Segmenter
+from pipeline.validator import Validator
+
+
+# Inputs: n -> text of about n characters
+GENERATORS: Dict[str, Callable[[int], str]] = {
+    "long_line": lambda n: ("Rahim mirpur shirt 2pc " * (n // 23 + 1))[:n],
+    "digit_run": lambda n: "0" * n,
+    "phone_runs": lambda n: ("01711234567 " * (n // 12 + 1))[:n],
+    "glued_phones": lambda n: ("01711234567" * (n // 11 + 1))[:n],
+    "near_phones": lambda n: ("0171123456 " * (n // 11 + 1))[:n],
+    "phone_lines": lambda n: ("Rahim Uddin 01711234567 Mirpur 10 shirt 2pc\n" * (n // 44 + 1))[:n],
+    "emoji_zwj": lambda n: ("😊👍🏽‍👨‍👩‍👧" * (n // 9 + 1))[:n],
+    "punctuation_storm": lambda n: ("!?.,;:।॥ ক!!?? a.,.," * (n // 20 + 1))[:n],
+    "bengali_digits": lambda n: ("০১৭১১২৩৪৫৬৭ " * (n // 12 + 1))[:n],
+    "blank_lines": lambda n: ("Rahim\n \n \n" * (n // 11 + 1))[:n],
+    "name_lines": lambda n: ("Rahim Uddin\n" * (n // 12 + 1))[:n],
+    "caps_words": lambda n: ("Ab " * (n // 3)) + "01711234567 Cd Ef 01811234567",
+}
+
+# Fragments the fuzzer glues together
+FUZZ_FRAGMENTS = [
+    "01711234567", "+8801811234567", "০১৯১১২৩৪৫৬৭", "0171123456", "1711234567",
+    "0" * 50, "9" * 13, "2pc", "3 ta", "ekta", "duiti", "Mirpur 10", "road 5 house 7",
+    "Rahim", "Karim Uddin", "name:", "amar nam", "address:", "phone",
+    "😊", "👍🏽", "‍", "🇧🇩", "!!!", "?!?!", "...", ",,,", ";;", "।", "॥",
+    "আমার নাম", "ঢাকা", " ", "  ", "\n", "\n\n", "\n\n\n", "\t",
+]
+
+
+def fuzz_text(rng: random.Random, size: int) -> str:
+    """Random mix of order-like and hostile fragments, about `size` characters long."""
+    parts: List[str] = []
+    length = 0
+    while length < size:
+        fragment = rng.choice(FUZZ_FRAGMENTS)
+        if rng.random() < 0.05:
+            # Occasional long run of one fragment
+            fragment = fragment * rng.randint(10, 200)
+        parts.append(fragment)
+        length += len(fragment)
+    return "".join(parts)[:size]
+
+
+def orders_from_text(text: str, field_size: int = 200) -> Dict[str, Any]:
+    """Extraction-shaped data with the text spread over order fields (fixer/validator input)."""
+    orders = []
+    for start in range(0, len(text), field_size * 3):
+        chunk = text[start:start + field_size * 3]
+        orders.append({
+            "customer_name": chunk[:field_size],
+            "phone": chunk[field_size:field_size * 2] or chunk,
+            "address": chunk[field_size * 2:],
+            "item": chunk,
+            "quantity": None,
+            "notes": None,
+        })
+    return {"orders": orders}
+
+
+# Stage name -> callable taking raw text. Stages after the cleaner get cleaned text,
+# as they do in the pipeline.
+STAGES: Dict[str, Callable[[str], Any]] = {
+    "clean": TextCleaner.clean,
+    "split": BatchSplitter.split,
+    "segment": Segmenter.split,
+    "rules": RuleExtractor.extract,
+    "fix": lambda text: AutoFixer.auto_fix(orders_from_text(text)),
+    "validate": lambda text: Validator.validate(orders_from_text(text)),
+}
+CLEANED_INPUT = {"split", "segment", "rules", "fix", "validate"}
+
+# Ceilings per MB of input: seconds, and tracemalloc peak in MB
+TIME_BUDGETS = {
+    "clean": 1.0,
+    "split": 1.0,
+    "segment": 3.0,
+    "rules": 3.0,
+    "fix": 2.0,
+    "validate": 2.0,
+}
+MEMORY_BUDGETS = {
+    "clean": 16,
+    "split": 32,
+    "segment": 128,
+    "rules": 64,
+    "fix": 64,
+    "validate": 64,
+}
+
+# time(4n) / time(n); linear is ~4, quadratic ~16
+MAX_GROWTH_RATIO = 8.0
+# Below this the ratio is mostly timer noise
+MIN_MEASURABLE_SECONDS = 0.002
+
+RUNS = 3
+
+
+def stage_input(stage: str, text: str) -> str:
+    return TextCleaner.clean(text) if stage in CLEANED_INPUT else text
+
+
+def best_time(func: Callable[[str], Any], text: str, runs: int = RUNS) -> float:
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func(text)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def peak_memory(func: Callable[[str], Any], text: str) -> int:
+    """tracemalloc peak in bytes while running func(text)."""
+    tracemalloc.start()
+    try:
+        func(text)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def hotspots(func: Callable[[str], Any], text: str, limit: int = 8) -> str:
+    """Top functions by cumulative time for one call."""
+    profiler = cProfile.Profile()
+    profiler.runcall(func, text)
+    out = io.StringIO()
+    pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(limit)
+    return out.getvalue()
+
+
+def measure(stage: str, text: str, scale: float = 1.0) -> Dict[str, Any]:
+    """
+    Check one stage on one input.
+
+    Times the stage at 1/16, 1/4 and all of the input and stops at the
+    first 4x step that grows too fast, so a quadratic stage fails
+    before it gets to the full size.
+
+    Returns:
+        Measurements plus `failures` (empty when within budget)
+    """
+    func = STAGES[stage]
+    failures = []
+    ratio = 0.0
+    previous_seconds = None
+    for length in (len(text) // 16, len(text) // 4, len(text)):
+        sample = stage_input(stage, text[:length])
+        seconds = best_time(func, sample)
+        if previous_seconds is not None and seconds >= MIN_MEASURABLE_SECONDS:
+            step = seconds / max(previous_seconds, MIN_MEASURABLE_SECONDS)
+            ratio = max(ratio, step)
+            if step > MAX_GROWTH_RATIO:
+                failures.append(f"grows {step:.1f}x for 4x input at {length} chars (max {MAX_GROWTH_RATIO})")
+                break
+        previous_seconds = seconds
+
+    megabytes = max(len(text[:length].encode('utf-8')) / 1_000_000, 1e-6)
+    seconds_per_mb = seconds / megabytes
+    peak_mb_per_mb = peak_memory(func, sample) / 1_000_000 / megabytes
+
+    if seconds_per_mb > TIME_BUDGETS[stage] * scale:
+        failures.append(f"{seconds_per_mb:.2f} s/MB (budget {TIME_BUDGETS[stage] * scale})")
+    if peak_mb_per_mb > MEMORY_BUDGETS[stage] * scale:
+        failures.append(f"peak {peak_mb_per_mb:.0f} MB/MB (budget {MEMORY_BUDGETS[stage] * scale:.0f})")
+
+    return {
+        "stage": stage,
+        "seconds": seconds,
+        "ratio": ratio,
+        "seconds_per_mb": seconds_per_mb,
+        "peak_mb_per_mb": peak_mb_per_mb,
+        "failures": failures,
+        "hotspots": hotspots(func, sample) if failures else "",
+    }
+
+
+def run(
+    size: int = 100_000,
+    fuzz_cases: int = 20,
+    seed: int = 0,
+    stages: Optional[List[str]] = None,
+    scale: float = 1.0,
+) -> List[Dict[str, Any]]:
+    """Measure every stage on every generator and on seeded fuzz inputs."""
+    rng = random.Random(seed)
+    inputs = [(name, generate(size)) for name, generate in GENERATORS.items()]
+    inputs += [(f"fuzz[{seed}:{i}]", fuzz_text(rng, size)) for i in range(fuzz_cases)]
+
+    results = []
+    for name, text in inputs:
+        for stage in stages or list(STAGES):
+            result = measure(stage, text, scale)
+            result["input"] = name
+            results.append(result)
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--size", type=int, default=1_000_000, help="characters per input")
+    parser.add_argument("--fuzz", type=int, default=20, help="number of fuzz inputs")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    scale = float(os.getenv("PERF_BUDGET_SCALE", "1"))
+
+    print(f"{'input':<20}{'stage':<10}{'seconds':>9}{'4x ratio':>10}{'s/MB':>8}{'MB/MB':>8}")
+    failed = False
+    for result in run(args.size, args.fuzz, args.seed, scale=scale):
+        status = "" if not result["failures"] else "  FAIL: " + "; ".join(result["failures"])
+        print(
+            f"{result['input']:<20}{result['stage']:<10}{result['seconds']:>9.3f}"
+            f"{result['ratio']:>10.1f}{result['seconds_per_mb']:>8.2f}{result['peak_mb_per_mb']:>8.1f}{status}"
+        )
+        if result["failures"]:
+            failed = True
+            print(result["hotspots"])
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Compare block splitters on the labeled segmentation corpus.
+
+Every block costs one extraction call. A block that holds no order comes
+back as `orders: []`, fails validation and costs two more correction
+calls. An order counts as extracted only if exactly one block holds its
+phone, name and (where labeled) address, and nothing from another order.
+
+Usage:
+    python benchmarks/segmentation.py
+"""
+
+import json
+import os
+import sys
+from typing import Any, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import config
+from pipeline.batch_splitter import BatchSplitter
+from pipeline.cleaner import TextCleaner
+from pipeline.segmenter import Segmenter
+
+CORPUS_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "test_samples",
+    "segmentation_corpus.jsonl",
+)
+
+
+def load_corpus(path: str = CORPUS_PATH) -> List[Dict[str, Any]]:
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _keys(order: Dict[str, Any]) -> List[str]:
+    return [value for value in (order.get("phone"), order.get("name"), order.get("address")) if value]
+
+
+def evaluate(splitter: Any, corpus: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Score a splitter: blocks, empty blocks, extracted orders and LLM calls per order."""
+    blocks_total = 0
+    empty_blocks = 0
+    expected_orders = 0
+    extracted_orders = 0
+
+    for sample in corpus:
+        blocks = splitter.split(TextCleaner.clean(sample["text"]))
+        orders = sample["orders"]
+        blocks_total += len(blocks)
+        expected_orders += len(orders)
+
+        for block in blocks:
+            if not any(key in block for order in orders for key in _keys(order)):
+                empty_blocks += 1
+
+        for order in orders:
+            owner = _keys(order)[0]
+            holding = [block for block in blocks if owner in block]
+            if len(holding) != 1:
+                continue
+            block = holding[0]
+            complete = all(key in block for key in _keys(order))
+            foreign = any(
+                key in block
+                for other in orders if other is not order
+                for key in _keys(other)
+            )
+            if complete and not foreign:
+                extracted_orders += 1
+
+    llm_calls = blocks_total + empty_blocks * config.MAX_RETRIES
+    return {
+        "blocks": blocks_total,
+        "empty_blocks": empty_blocks,
+        "expected_orders": expected_orders,
+        "extracted_orders": extracted_orders,
+        "llm_calls": llm_calls,
+        "llm_calls_per_order": round(llm_calls / extracted_orders, 2) if extracted_orders else None,
+    }
+
+
+def main() -> None:
+    corpus = load_corpus()
+    print(f"Corpus: {len(corpus)} samples\n")
+    print(f"{'splitter':<14}{'blocks':>8}{'empty':>8}{'orders':>10}{'calls':>8}{'calls/order':>13}")
+    for name, splitter in (("phone", BatchSplitter), ("context", Segmenter)):
+        result = evaluate(splitter, corpus)
+        orders = f"{result['extracted_orders']}/{result['expected_orders']}"
+        print(
+            f"{name:<14}{result['blocks']:>8}{result['empty_blocks']:>8}{orders:>10}"
+            f"{result['llm_calls']:>8}{str(result['llm_calls_per_order']):>13}"
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Encode time and bytes on the wire for /process-text responses.
+
+Builds responses with 1, 50 and 500 orders (one block per order, with the
+full debug section) and compares the stdlib encoder used by JSONResponse
+with the fast path in serialization.py, then gzip/brotli sizes.
+
+Usage:
+    python benchmarks/serialization.py
+"""
+
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pipeline.processor import ProcessingResult, processor
+from serialization import encode_json, encoded_sizes, orjson
+
+
+def build_response(order_count: int) -> dict:
+    blocks = []
+    results = []
+    for i in range(order_count):
+        block = f"Customer {i} 017{i:08d}\nMirpur {i % 14} road {i % 30}\nblack shirt {i % 5 + 1}pc"
+        data = {
+            "orders": [
+                {
+                    "customer_name": f"Customer {i}",
+                    "phone": f"017{i:08d}",
+                    "address": f"Mirpur {i % 14} road {i % 30}",
+                    "item": "black shirt",
+                    "quantity": i % 5 + 1,
+                    "notes": None,
+                }
+            ]
+        }
+        blocks.append(block)
+        results.append(ProcessingResult(block, data, data, data))
+    return processor.build_response(blocks, results, 0.5)
+
+
+def stdlib_encode(content: dict) -> bytes:
+    # What starlette's JSONResponse does
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def main() -> None:
+    print(f"fast encoder: {'orjson' if orjson is not None else 'json (orjson not installed)'}\n")
+    print(f"{'orders':>7}{'stdlib ms':>11}{'fast ms':>10}{'speedup':>9}   bytes on the wire")
+    for order_count in (1, 50, 500):
+        content = build_response(order_count)
+        number = max(1, 2000 // order_count)
+        stdlib_ms = min(timeit.repeat(lambda: stdlib_encode(content), number=number, repeat=5)) / number * 1000
+        fast_ms = min(timeit.repeat(lambda: encode_json(content), number=number, repeat=5)) / number * 1000
+        sizes = "  ".join(f"{name}={size}" for name, size in encoded_sizes(encode_json(content)))
+        print(f"{order_count:>7}{stdlib_ms:>11.3f}{fast_ms:>10.3f}{stdlib_ms / fast_ms:>8.1f}x   {sizes}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+Offline bulk processing over JSONL or plain-text chat exports.
+
+Cleaning and splitting run across a process pool, LLM work goes through
+the processor's bounded executor, and results are written as JSONL in
+input order. Progress is checkpointed so an interrupted run can resume.
+
+Usage:
+    python cli.py input.jsonl -o results.jsonl
+    python cli.py chats.txt --format text -o results.jsonl --resume
+"""
+
+import argparse
+import itertools
+import json
+import os
+import sys
+import time
+from collections import deque
+from multiprocessing import Pool
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from config import config
+
+# (record_index, record_id, blocks, error)
+PreparedRecord = Tuple[int, Any, Optional[List[str]], Optional[str]]
+
+
+def read_jsonl_records(path: str, start: int = 0) -> Iterator[Tuple[Any, Any, int]]:
+    """
+    Yield (record_id, text, end_offset) from a JSONL file, one record per
+    non-empty line, starting at byte offset `start`. end_offset is where
+    reading resumes after the record.
+
+    Lines that cannot be read yield an exception in place of the text, so
+    the record keeps its position and is reported as an error row.
+    """
+    with open(path, 'rb') as f:
+        f.seek(start)
+        offset = start
+        for raw_line in f:
+            offset += len(raw_line)
+            try:
+                line = raw_line.decode('utf-8').strip()
+            except UnicodeDecodeError as e:
+                yield None, ValueError(f"Invalid UTF-8: {e}"), offset
+                continue
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield None, ValueError(f"Invalid JSON: {e}"), offset
+                continue
+            if isinstance(record, str):
+                yield None, record, offset
+            elif isinstance(record, dict):
+                text = record.get("text")
+                if text is None:
+                    yield record.get("id"), "", offset
+                elif isinstance(text, str):
+                    yield record.get("id"), text, offset
+                else:
+                    yield record.get("id"), ValueError('"text" must be a string'), offset
+            else:
+                yield None, ValueError("Record must be an object or a string"), offset
+
+
+def read_text_records(path: str, start: int = 0) -> Iterator[Tuple[Any, str, int]]:
+    """
+    Yield (None, text, end_offset) from a plain-text export, one record per
+    blank-line separated chunk, starting at byte offset `start`.
+    """
+    with open(path, 'rb') as f:
+        f.seek(start)
+        offset = start
+        lines: List[str] = []
+        for raw_line in f:
+            offset += len(raw_line)
+            line = raw_line.decode('utf-8')
+            if line.strip():
+                lines.append(line)
+            elif lines:
+                yield None, "".join(lines), offset
+                lines = []
+        if lines:
+            yield None, "".join(lines), offset
+
+
+def count_records(path: str, fmt: str) -> Optional[int]:
+    """Cheap record count for the ETA. Only exact for JSONL."""
+    if fmt != "jsonl":
+        return None
+    total = 0
+    with open(path, 'rb') as f:
+        for line in f:
+            if line.strip():
+                total += 1
+    return total
+
+
+def prepare_record(item: Tuple[int, Tuple[Any, Any]]) -> PreparedRecord:
+    """
+    Clean and split one record. Runs in a pool worker.
+
+    Never raises: a record that cannot be prepared becomes an error row
+    instead of aborting the whole run.
+    """
+    index, (record_id, text) = item
+    try:
+        return _prepare_record(index, record_id, text)
+    except Exception as e:
+        return index, record_id, None, f"Could not prepare record: {e}"
+
+
+def _prepare_record(index: int, record_id: Any, text: Any) -> PreparedRecord:
+    from pipeline.admission import RequestTooLarge
+    from pipeline.cleaner import TextCleaner
+    from pipeline.segmenter import build_splitter
+
+    if isinstance(text, Exception):
+        return index, record_id, None, str(text)
+
+    blocks = build_splitter().split(TextCleaner.clean(text))
+    if len(blocks) > config.MAX_BLOCKS_PER_REQUEST:
+        error = RequestTooLarge(
+            "too_many_blocks",
+            f"Input has {len(blocks)} blocks, limit is {config.MAX_BLOCKS_PER_REQUEST}",
+        )
+        return index, record_id, None, str(error)
+
+    return index, record_id, blocks, None
+
+
+class Checkpoint:
+    """Progress marker stored next to the output file."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def load(self) -> Dict[str, int]:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {"records_done": 0, "output_offset": 0, "input_offset": 0}
+
+    def save(self, records_done: int, output_offset: int, input_offset: int) -> None:
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                "records_done": records_done,
+                "output_offset": output_offset,
+                "input_offset": input_offset,
+            }, f)
+        os.replace(tmp_path, self.path)
+
+    def clear(self) -> None:
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class Progress:
+    """Throughput and ETA on stderr."""
+
+    def __init__(self, total: Optional[int], already_done: int):
+        self.total = total
+        self.already_done = already_done
+        self.start_time = time.time()
+
+    def report(self, done: int, final: bool = False) -> None:
+        elapsed = max(time.time() - self.start_time, 1e-9)
+        rate = (done - self.already_done) / elapsed
+        line = f"{done} records | {rate:.1f} rec/s | {elapsed:.0f}s elapsed"
+        if self.total and rate > 0:
+            remaining = max(self.total - done, 0) / rate
+            line += f" | {done}/{self.total} | ETA {remaining:.0f}s"
+        sys.stderr.write("\r" + line + ("\n" if final else ""))
+        sys.stderr.flush()
+
+
+def process_chunk(processor, chunk: List[PreparedRecord]) -> Iterator[Dict[str, Any]]:
+    """
+    Run LLM work for a chunk of prepared records and yield output rows.
+
+    Rows are built one record at a time, so a written row's results can
+    be freed before the next row is built.
+    """
+    start_time = time.time()
+
+    all_blocks: List[str] = []
+    for _, _, blocks, _ in chunk:
+        if blocks:
+            all_blocks.extend(blocks)
+
+    pending = deque(processor.process_blocks(all_blocks))
+    processing_time = time.time() - start_time
+
+    for index, record_id, blocks, error in chunk:
+        row: Dict[str, Any] = {"line": index, "id": record_id}
+        if error is not None:
+            row["error"] = error
+        else:
+            results = [pending.popleft() for _ in blocks]
+            row["result"] = processor.build_response(blocks, results, processing_time)
+        yield row
+
+
+def _prepare_window(pool: Optional[Pool], workers: int, records: Iterator, size: int, input_offset: int):
+    """
+    Start preparing the next window of records; only one window is buffered at a time.
+
+    Returns:
+        (pending prepared records, input offset after the window)
+    """
+    window = []
+    for index, (record_id, text, end_offset) in itertools.islice(records, size):
+        window.append((index, (record_id, text)))
+        input_offset = end_offset
+    if pool is None:
+        return [prepare_record(item) for item in window], input_offset
+    return pool.map_async(prepare_record, window, chunksize=max(1, size // (workers * 4))), input_offset
+
+
+def run(args: argparse.Namespace) -> int:
+    """Process the input file and return an exit code."""
+    from pipeline.processor import processor
+
+    processor.max_workers = args.concurrency
+
+    checkpoint = Checkpoint(args.output + ".checkpoint")
+    state = checkpoint.load() if args.resume else {"records_done": 0, "output_offset": 0, "input_offset": 0}
+    output_size = os.path.getsize(args.output) if os.path.exists(args.output) else None
+    if state["output_offset"] and (output_size is None or output_size < state["output_offset"]):
+        # Seeking past the end would pad the output with NUL bytes
+        sys.stderr.write("Output file is missing or shorter than the checkpoint; starting over\n")
+        state = {"records_done": 0, "output_offset": 0, "input_offset": 0}
+    records_done = state["records_done"]
+    input_offset = state.get("input_offset")
+
+    reader = read_jsonl_records if args.format == "jsonl" else read_text_records
+    if input_offset is not None:
+        # Seek past the finished records instead of reading and parsing them again
+        records = enumerate(reader(args.input, input_offset), records_done)
+    else:
+        # Checkpoint from before input offsets were stored
+        input_offset = 0
+        records = itertools.islice(enumerate(reader(args.input)), records_done, None)
+
+    total = args.total if args.total is not None else count_records(args.input, args.format)
+    progress = Progress(total, records_done)
+
+    mode = 'r+b' if args.resume and output_size is not None else 'wb'
+    with open(args.output, mode) as out:
+        out.seek(state["output_offset"])
+        out.truncate()
+
+        pool = Pool(args.workers) if args.workers > 0 else None
+        try:
+            pending, pending_offset = _prepare_window(pool, args.workers, records, args.chunk_size, input_offset)
+            while True:
+                chunk = pending.get() if pool is not None else pending
+                if not chunk:
+                    break
+                input_offset = pending_offset
+                # Clean and split the next window while this one is in the LLM stage
+                pending, pending_offset = _prepare_window(
+                    pool, args.workers, records, args.chunk_size, input_offset,
+                )
+
+                for row in process_chunk(processor, chunk):
+                    out.write((json.dumps(row, ensure_ascii=False) + "\n").encode('utf-8'))
+                out.flush()
+                os.fsync(out.fileno())
+
+                records_done += len(chunk)
+                checkpoint.save(records_done, out.tell(), input_offset)
+                progress.report(records_done)
+        finally:
+            if pool is not None:
+                pool.terminate()
+
+    progress.report(records_done, final=True)
+    checkpoint.clear()
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Bulk order extraction over JSONL or plain-text chat exports")
+    parser.add_argument("input", help="Input file")
+    parser.add_argument("-o", "--output", required=True, help="Output JSONL file")
+    parser.add_argument("--format", choices=["jsonl", "text"], default="jsonl",
+                        help="jsonl: one {\"id\", \"text\"} object per line; text: blank-line separated messages")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Processes for cleaning/splitting (0 = in-process)")
+    parser.add_argument("--concurrency", type=int, default=config.MAX_CONCURRENT_LLM_CALLS,
+                        help="Concurrent blocks in the LLM stage")
+    parser.add_argument("--chunk-size", type=int, default=64,
+                        help="Records per checkpoint")
+    parser.add_argument("--resume", action="store_true", help="Resume from the last checkpoint")
+    parser.add_argument("--total", type=int, help="Total records, for the ETA")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    return run(build_parser().parse_args(argv))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -16,6 +16,80 @@ class Config:
     # Processing Settings
     MAX_RETRIES: int = 2
     
+    # Block splitting: "context" (line-feature segmenter) or "phone" (split at each phone)
+    SEGMENTER: str = os.getenv("SEGMENTER", "context")
+    
+    # Incremental reprocessing sessions
+    SESSION_MAX_COUNT: int = int(os.getenv("SESSION_MAX_COUNT", "1000"))
+    SESSION_TTL_SECONDS: float = float(os.getenv("SESSION_TTL_SECONDS", "1800"))
+    
+    # Admission Control
+    MAX_INPUT_BYTES: int = int(os.getenv("MAX_INPUT_BYTES", "65536"))
+    MAX_BLOCKS_PER_REQUEST: int = int(os.getenv("MAX_BLOCKS_PER_REQUEST", "50"))
+    MAX_MESSAGES_PER_BATCH: int = int(os.getenv("MAX_MESSAGES_PER_BATCH", "200"))
+    MAX_BATCH_INPUT_BYTES: int = int(os.getenv("MAX_BATCH_INPUT_BYTES", "1048576"))
+    # A batch holds one admission slot, so its total block count is capped too
+    MAX_BLOCKS_PER_BATCH: int = int(os.getenv("MAX_BLOCKS_PER_BATCH", "100"))
+    # Raw body caps, enforced before the JSON is read and parsed. JSON escapes can
+    # make text up to 6x longer ("\u0000"), so they default to 6x the text limits
+    # plus room for the rest of the body.
+    MAX_BODY_BYTES: int = int(os.getenv("MAX_BODY_BYTES", str(6 * MAX_INPUT_BYTES + 4096)))
+    MAX_BATCH_BODY_BYTES: int = int(os.getenv("MAX_BATCH_BODY_BYTES", str(6 * MAX_BATCH_INPUT_BYTES + 65536)))
+    MAX_CONCURRENT_REQUESTS: int = int(os.getenv("MAX_CONCURRENT_REQUESTS", "8"))
+    MAX_QUEUE_DEPTH: int = int(os.getenv("MAX_QUEUE_DEPTH", "32"))
+    MAX_QUEUED_PER_CLIENT: int = int(os.getenv("MAX_QUEUED_PER_CLIENT", "4"))
+    QUEUE_TIMEOUT_SECONDS: float = float(os.getenv("QUEUE_TIMEOUT_SECONDS", "10"))
+    MAX_CONCURRENT_LLM_CALLS: int = int(os.getenv("MAX_CONCURRENT_LLM_CALLS", "16"))
+    RETRY_AFTER_SECONDS: int = int(os.getenv("RETRY_AFTER_SECONDS", "5"))
+    # Key fair queuing on the X-Client-ID header instead of the peer address.
+    # Only enable behind a proxy that sets the header itself.
+    TRUST_CLIENT_ID_HEADER: bool = os.getenv("TRUST_CLIENT_ID_HEADER", "").lower() in ("1", "true", "yes")
+    
+    # Cross-request micro-batching of extraction calls (a window of 0 disables it)
+    EXTRACT_BATCH_WINDOW_SECONDS: float = float(os.getenv("EXTRACT_BATCH_WINDOW_SECONDS", "0"))
+    EXTRACT_BATCH_MAX_SIZE: int = int(os.getenv("EXTRACT_BATCH_MAX_SIZE", "8"))
+    # Output budget of a batched call: this many tokens per block, at least MAX_TOKENS,
+    # at most EXTRACT_BATCH_MAX_TOKENS (which also caps the batch size)
+    EXTRACT_BATCH_TOKENS_PER_BLOCK: int = int(os.getenv("EXTRACT_BATCH_TOKENS_PER_BLOCK", "500"))
+    EXTRACT_BATCH_MAX_TOKENS: int = int(os.getenv("EXTRACT_BATCH_MAX_TOKENS", "4096"))
+    
+    # Warm-up: load prompts and build the LLM client in the background at startup
+    WARMUP_ON_STARTUP: bool = os.getenv("WARMUP_ON_STARTUP", "true").lower() in ("1", "true", "yes")
+    WARMUP_CONNECT: bool = os.getenv("WARMUP_CONNECT", "true").lower() in ("1", "true", "yes")
+    
+    # Responses larger than this are gzip/brotli compressed when the client accepts it
+    COMPRESSION_MIN_BYTES: int = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
+    
+    # LLM Circuit Breaker
+    LLM_TIMEOUT_SECONDS: float = float(os.getenv("LLM_TIMEOUT_SECONDS", "30"))
+    BREAKER_WINDOW_SIZE: int = int(os.getenv("BREAKER_WINDOW_SIZE", "20"))
+    BREAKER_MIN_CALLS: int = int(os.getenv("BREAKER_MIN_CALLS", "5"))
+    BREAKER_FAILURE_RATE: float = float(os.getenv("BREAKER_FAILURE_RATE", "0.5"))
+    BREAKER_SLOW_CALL_SECONDS: float = float(os.getenv("BREAKER_SLOW_CALL_SECONDS", "15"))
+    BREAKER_SLOW_CALL_RATE: float = float(os.getenv("BREAKER_SLOW_CALL_RATE", "0.8"))
+    BREAKER_OPEN_SECONDS: float = float(os.getenv("BREAKER_OPEN_SECONDS", "30"))
+    
+    # LLM Cassettes (record/replay)
+    LLM_CASSETTE_MODE: str = os.getenv("LLM_CASSETTE_MODE", "")  # "", "record" or "replay"
+    LLM_CASSETTE_PATH: str = os.getenv(
+        "LLM_CASSETTE_PATH",
+        os.path.join(os.path.dirname(__file__), "cassettes", "llm.jsonl.gz"),
+    )
+    LLM_CASSETTE_REPLAY_LATENCY: bool = os.getenv("LLM_CASSETTE_REPLAY_LATENCY", "").lower() in ("1", "true", "yes")
+    
+    # Tracing
+    TRACE_EXPORTER: str = os.getenv("TRACE_EXPORTER", "")  # "", "file" or "otlp"
+    TRACE_FILE_PATH: str = os.getenv(
+        "TRACE_FILE_PATH",
+        os.path.join(os.path.dirname(__file__), "logs", "traces.jsonl"),
+    )
+    TRACE_OTLP_ENDPOINT: str = os.getenv("TRACE_OTLP_ENDPOINT", "http://localhost:4318/v1/traces")
+    SLOW_REQUEST_SECONDS: float = float(os.getenv("SLOW_REQUEST_SECONDS", "10"))  # 0 disables
+    SLOW_REQUEST_LOG_PATH: str = os.getenv(
+        "SLOW_REQUEST_LOG_PATH",
+        os.path.join(os.path.dirname(__file__), "logs", "slow_requests.jsonl"),
+    )
+    
     # Paths
     PROMPTS_DIR: str = os.path.join(os.path.dirname(__file__), "prompts")
     SYSTEM_PROMPT_PATH: str = os.path.join(PROMPTS_DIR, "system_prompt.txt")
@@ -0,0 +1,193 @@
+import asyncio
+import threading
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Optional
+
+from config import config
+
+
+class AdmissionRejected(Exception):
+    """Request shed before (or while) it was processed."""
+
+    def __init__(self, status_code: int, reason: str, detail: str, retry_after: Optional[int] = None):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.reason = reason
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+class RequestTooLarge(AdmissionRejected):
+    """Request exceeds a size limit; retrying the same payload will not help."""
+
+    def __init__(self, reason: str, detail: str):
+        super().__init__(413, reason, detail)
+
+
+def check_input_size(text: str, limit: int) -> None:
+    """Raise RequestTooLarge if text is over limit bytes (UTF-8)."""
+    size = len(text.encode('utf-8'))
+    if size > limit:
+        raise RequestTooLarge(
+            "input_too_large",
+            f"Input is {size} bytes, limit is {limit}",
+        )
+
+
+class AdmissionController:
+    """
+    Admission control for the HTTP endpoints.
+
+    - At most max_active requests are processed at once.
+    - Waiting requests are queued per client and admitted round-robin,
+      so one busy client cannot starve the others.
+    - A full queue sheds with 503, a client over its share sheds with 429.
+    """
+
+    def __init__(
+        self,
+        max_active: int,
+        max_queue_depth: int,
+        max_queued_per_client: int,
+        queue_timeout: float,
+        retry_after: int,
+    ):
+        self.max_active = max_active
+        self.max_queue_depth = max_queue_depth
+        self.max_queued_per_client = max_queued_per_client
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+
+        self._active = 0
+        self._queued = 0
+        self._waiting: "OrderedDict[str, Deque[asyncio.Future]]" = OrderedDict()
+
+        self.admitted_count = 0
+        self.shed_counts: Dict[str, int] = {}
+
+    def check_input(self, text: str) -> None:
+        """Reject input larger than MAX_INPUT_BYTES."""
+        check_input_size(text, config.MAX_INPUT_BYTES)
+
+    async def acquire(self, client_id: str) -> None:
+        """Wait for a processing slot, or raise AdmissionRejected."""
+        if self._active < self.max_active and self._queued == 0:
+            self._active += 1
+            self.admitted_count += 1
+            return
+
+        if self._queued >= self.max_queue_depth:
+            raise AdmissionRejected(503, "queue_full", "Server is busy, try again later", self.retry_after)
+
+        queue = self._waiting.get(client_id)
+        if queue is not None and len(queue) >= self.max_queued_per_client:
+            raise AdmissionRejected(429, "client_limit", "Too many pending requests for this client", self.retry_after)
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiting.setdefault(client_id, deque()).append(waiter)
+        self._queued += 1
+
+        try:
+            await asyncio.wait_for(waiter, timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._give_up(client_id, waiter)
+            raise AdmissionRejected(503, "queue_timeout", "Timed out waiting in queue", self.retry_after)
+        except asyncio.CancelledError:
+            self._give_up(client_id, waiter)
+            raise
+
+        self.admitted_count += 1
+
+    def release(self) -> None:
+        """Free a slot, handing it to the next waiting client round-robin."""
+        while self._waiting:
+            client_id, queue = next(iter(self._waiting.items()))
+            waiter = queue.popleft()
+            self._queued -= 1
+
+            if queue:
+                self._waiting.move_to_end(client_id)
+            else:
+                del self._waiting[client_id]
+
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+
+        self._active -= 1
+
+    def _give_up(self, client_id: str, waiter: asyncio.Future) -> None:
+        """
+        Clean up after a waiter that timed out or was cancelled.
+
+        A waiter still queued is removed. One that release() already
+        popped either got the slot (its result is set), which is passed
+        on, or was skipped because it was cancelled first and got nothing.
+        """
+        queue = self._waiting.get(client_id)
+        if queue is not None and waiter in queue:
+            queue.remove(waiter)
+            self._queued -= 1
+            if not queue:
+                del self._waiting[client_id]
+
+        if waiter.done() and not waiter.cancelled():
+            self.release()
+
+    def record_shed(self, reason: str) -> None:
+        """Count a shed request by reason."""
+        self.shed_counts[reason] = self.shed_counts.get(reason, 0) + 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot for monitoring."""
+        return {
+            "active": self._active,
+            "max_active": self.max_active,
+            "queue_depth": self._queued,
+            "max_queue_depth": self.max_queue_depth,
+            "queued_clients": len(self._waiting),
+            "admitted": self.admitted_count,
+            "shed": dict(self.shed_counts),
+            "shed_total": sum(self.shed_counts.values()),
+        }
+
+
+class LLMLimiter:
+    """Process-wide cap on concurrent LLM calls."""
+
+    def __init__(self, max_concurrent: int):
+        self.max_concurrent = max_concurrent
+        self._semaphore = threading.BoundedSemaphore(max_concurrent)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+
+    @contextmanager
+    def slot(self):
+        """Hold one LLM slot for the duration of the block."""
+        with self._semaphore:
+            with self._lock:
+                self.in_flight += 1
+            try:
+                yield
+            finally:
+                with self._lock:
+                    self.in_flight -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot for monitoring."""
+        return {
+            "in_flight": self.in_flight,
+            "max_concurrent": self.max_concurrent,
+        }
+
+
+# Singleton instances
+admission = AdmissionController(
+    max_active=config.MAX_CONCURRENT_REQUESTS,
+    max_queue_depth=config.MAX_QUEUE_DEPTH,
+    max_queued_per_client=config.MAX_QUEUED_PER_CLIENT,
+    queue_timeout=config.QUEUE_TIMEOUT_SECONDS,
+    retry_after=config.RETRY_AFTER_SECONDS,
+)
+llm_limiter = LLMLimiter(config.MAX_CONCURRENT_LLM_CALLS)
@@ -0,0 +1,165 @@
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+
+class _Pending:
+    """One submitted item waiting for its batch."""
+
+    __slots__ = ("item", "enqueued", "lead", "done", "result", "error")
+
+    def __init__(self, item: Any, enqueued: float):
+        self.item = item
+        self.enqueued = enqueued
+        self.lead = False
+        self.done = False
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class MicroBatcher:
+    """
+    Process-wide micro-batcher for calls made from many threads.
+
+    Items submitted within window_seconds of each other (up to
+    max_batch_size) are handed to `handler` together, and each caller
+    gets back its own result.
+
+    There is no background thread: the first caller to find no batch
+    being collected leads it. It waits until the window closes or the
+    batch is full, then runs the handler in its own thread while the
+    other callers block. If more items arrived than fit, the oldest
+    waiting caller leads the next batch.
+
+    A window of 0 or a size cap of 1 disables batching; every item is
+    then handed to the handler on its own.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[List[Any]], List[Any]],
+        window_seconds: float,
+        max_batch_size: int,
+    ):
+        self.handler = handler
+        self.window_seconds = window_seconds
+        self.max_batch_size = max_batch_size
+
+        self._cond = threading.Condition()
+        self._pending: List[_Pending] = []
+        self._collecting = False
+
+        self.batch_count = 0
+        self.item_count = 0
+        self.full_batches = 0
+        self.largest_batch = 0
+        self.fallback_count = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return self.window_seconds > 0 and self.max_batch_size > 1
+
+    def submit(self, item: Any) -> Any:
+        """
+        Queue an item and block until its batch has been handled.
+
+        Returns:
+            The handler's result for this item
+
+        Raises:
+            Whatever the handler raised for the batch
+        """
+        if not self.enabled:
+            return self.handler([item])[0]
+
+        entry = _Pending(item, time.monotonic())
+        with self._cond:
+            self._pending.append(entry)
+            if not self._collecting:
+                self._collecting = True
+                entry.lead = True
+            elif len(self._pending) >= self.max_batch_size:
+                self._cond.notify_all()
+
+            while not entry.done and not entry.lead:
+                self._cond.wait()
+
+            # Led callers are always at the front of the queue, so in their own batch
+            batch = None if entry.done else self._collect(entry)
+
+        if batch is not None:
+            self._run(batch)
+
+        if entry.error is not None:
+            raise entry.error
+        return entry.result
+
+    def record_fallback(self, items: int) -> None:
+        """Count items that had to be processed one by one (e.g. unparsable batch reply)."""
+        with self._cond:
+            self.fallback_count += items
+
+    def _collect(self, leader: _Pending) -> List[_Pending]:
+        """Wait for the window or a full batch and take it off the queue (lock held)."""
+        deadline = leader.enqueued + self.window_seconds
+        while len(self._pending) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            self._cond.wait(remaining)
+
+        batch = self._pending[:self.max_batch_size]
+        del self._pending[:self.max_batch_size]
+
+        if self._pending:
+            # Overflow: the oldest waiting caller leads the next batch
+            self._pending[0].lead = True
+            self._cond.notify_all()
+        else:
+            self._collecting = False
+
+        now = time.monotonic()
+        waits = [now - entry.enqueued for entry in batch]
+        self.batch_count += 1
+        self.item_count += len(batch)
+        self.largest_batch = max(self.largest_batch, len(batch))
+        if len(batch) >= self.max_batch_size:
+            self.full_batches += 1
+        self._wait_total += sum(waits)
+        self._wait_max = max(self._wait_max, max(waits))
+        return batch
+
+    def _run(self, batch: List[_Pending]) -> None:
+        """Run the handler for a batch and wake its callers."""
+        try:
+            results = self.handler([entry.item for entry in batch])
+            for entry, result in zip(batch, results):
+                entry.result = result
+        except Exception as e:
+            for entry in batch:
+                entry.error = e
+
+        with self._cond:
+            for entry in batch:
+                entry.done = True
+            self._cond.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot for monitoring."""
+        with self._cond:
+            return {
+                "enabled": self.enabled,
+                "window_seconds": self.window_seconds,
+                "max_batch_size": self.max_batch_size,
+                "pending": len(self._pending),
+                "batches": self.batch_count,
+                "items": self.item_count,
+                "full_batches": self.full_batches,
+                "largest_batch": self.largest_batch,
+                "average_batch_size": round(self.item_count / self.batch_count, 2) if self.batch_count else 0.0,
+                "fallback_items": self.fallback_count,
+                "average_wait_seconds": round(self._wait_total / self.item_count, 4) if self.item_count else 0.0,
+                "max_wait_seconds": round(self._wait_max, 4),
+            }
@@ -0,0 +1,118 @@
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+
+class CassetteMiss(Exception):
+    """No recorded response for this prompt."""
+
+
+class RecordedError(Exception):
+    """An LLM error replayed from a cassette."""
+
+    def __init__(self, message: str, backend_failure: bool = True):
+        super().__init__(message)
+        self.backend_failure = backend_failure
+
+
+class Cassette:
+    """
+    Record/replay store for LLM calls.
+
+    Entries are keyed by a hash of the full request (model, messages and
+    sampling parameters) and stored as gzip-compressed JSON lines:
+    {"k": key, "kind": "extract" | "correct", "c": content, "e": error,
+    "b": error counts against the circuit breaker, "t": latency}.
+
+    A prompt that was sent several times (e.g. a retried correction) is
+    replayed in the order it was recorded; the last response repeats.
+    """
+
+    RECORD = "record"
+    REPLAY = "replay"
+
+    def __init__(self, path: str, mode: str, replay_latency: bool = False):
+        if mode not in (self.RECORD, self.REPLAY):
+            raise ValueError(f"Unknown cassette mode: {mode}")
+
+        self.path = path
+        self.mode = mode
+        self.replay_latency = replay_latency
+        self._lock = threading.Lock()
+        self._entries: Dict[str, List[Dict[str, Any]]] = {}
+        self._positions: Dict[str, int] = {}
+
+        if mode == self.REPLAY:
+            self._load()
+        elif os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    @staticmethod
+    def key(messages: List[Dict[str, str]], params: Dict[str, Any]) -> str:
+        """Stable hash of a chat-completion request."""
+        payload = json.dumps({"messages": messages, "params": params}, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:32]
+
+    def _load(self) -> None:
+        """Load all entries from the cassette file."""
+        with gzip.open(self.path, 'rt', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self._entries.setdefault(entry["k"], []).append(entry)
+
+    def record(
+        self,
+        kind: str,
+        messages: List[Dict[str, str]],
+        params: Dict[str, Any],
+        content: Optional[str],
+        latency: float,
+        error: Optional[str] = None,
+        backend_failure: bool = True,
+    ) -> None:
+        """Append one request/response pair."""
+        entry = {
+            "k": self.key(messages, params),
+            "kind": kind,
+            "c": content,
+            "e": error,
+            "b": backend_failure,
+            "t": round(latency, 4),
+        }
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        with self._lock:
+            # Each append is its own gzip member, so a crash loses at most one entry
+            with gzip.open(self.path, 'at', encoding='utf-8') as f:
+                f.write(line)
+
+    def replay(self, messages: List[Dict[str, str]], params: Dict[str, Any]) -> str:
+        """
+        Return the recorded response for this request.
+
+        Raises:
+            CassetteMiss: Nothing was recorded for this request
+            RecordedError: The recorded call failed
+        """
+        key = self.key(messages, params)
+        with self._lock:
+            entries = self._entries.get(key)
+            if not entries:
+                raise CassetteMiss(f"No recorded response for prompt {key}")
+            position = self._positions.get(key, 0)
+            self._positions[key] = position + 1
+            entry = entries[min(position, len(entries) - 1)]
+
+        if self.replay_latency and entry.get("t"):
+            time.sleep(entry["t"])
+
+        if entry.get("e") is not None:
+            raise RecordedError(entry["e"], entry.get("b", True))
+        return entry["c"]
+
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in self._entries.values())
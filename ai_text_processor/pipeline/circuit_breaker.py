@@ -0,0 +1,135 @@
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Tuple
+
+
+class CircuitOpenError(Exception):
+    """The LLM backend is considered unhealthy; the call was not attempted."""
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker around LLM calls.
+
+    - closed: calls go through; outcomes are kept in a rolling window.
+      The breaker opens when the failure rate or the slow-call rate in
+      the window reaches its threshold.
+    - open: calls fail immediately with CircuitOpenError until
+      open_seconds have passed.
+    - half_open: a limited number of probe calls go through. A successful
+      probe closes the breaker, a failed or slow one opens it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        window_size: int = 20,
+        min_calls: int = 5,
+        failure_rate: float = 0.5,
+        slow_call_seconds: float = 15.0,
+        slow_call_rate: float = 0.8,
+        open_seconds: float = 30.0,
+        half_open_max_calls: int = 1,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate = slow_call_rate
+        self.open_seconds = open_seconds
+        self.half_open_max_calls = half_open_max_calls
+        self._clock = clock
+
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        # (failed, slow) per call
+        self._window: Deque[Tuple[bool, bool]] = deque(maxlen=window_size)
+
+        self.opened_count = 0
+        self.rejected_count = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        if self._state == self.OPEN and self._clock() - self._opened_at >= self.open_seconds:
+            self._state = self.HALF_OPEN
+            self._probes_in_flight = 0
+        return self._state
+
+    def before_call(self) -> None:
+        """Reserve a call, or raise CircuitOpenError."""
+        with self._lock:
+            state = self._current_state()
+            if state == self.CLOSED:
+                return
+            if state == self.HALF_OPEN and self._probes_in_flight < self.half_open_max_calls:
+                self._probes_in_flight += 1
+                return
+            self.rejected_count += 1
+            raise CircuitOpenError("LLM backend unavailable (circuit open)")
+
+    def record(self, success: bool, latency: float) -> None:
+        """Record the outcome of a call reserved with before_call."""
+        slow = latency >= self.slow_call_seconds
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                self._probes_in_flight = max(self._probes_in_flight - 1, 0)
+                if success and not slow:
+                    self._state = self.CLOSED
+                    self._window.clear()
+                else:
+                    self._open()
+                return
+
+            self._window.append((not success, slow))
+            if self._state == self.CLOSED and self._should_open():
+                self._open()
+
+    def cancel(self) -> None:
+        """Release a call reserved with before_call that never reached the backend."""
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                self._probes_in_flight = max(self._probes_in_flight - 1, 0)
+
+    def _should_open(self) -> bool:
+        calls = len(self._window)
+        if calls < self.min_calls:
+            return False
+        failures = sum(1 for failed, _ in self._window if failed)
+        slow_calls = sum(1 for _, slow in self._window if slow)
+        return failures / calls >= self.failure_rate or slow_calls / calls >= self.slow_call_rate
+
+    def _open(self) -> None:
+        self._state = self.OPEN
+        self._opened_at = self._clock()
+        self._window.clear()
+        self.opened_count += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot for /health."""
+        with self._lock:
+            state = self._current_state()
+            calls = len(self._window)
+            failures = sum(1 for failed, _ in self._window if failed)
+            slow_calls = sum(1 for _, slow in self._window if slow)
+            return {
+                "state": state,
+                "window_calls": calls,
+                "window_failures": failures,
+                "window_slow_calls": slow_calls,
+                "opened_count": self.opened_count,
+                "rejected_count": self.rejected_count,
+                "retry_in_seconds": (
+                    round(max(self.open_seconds - (self._clock() - self._opened_at), 0.0), 1)
+                    if state == self.OPEN else 0.0
+                ),
+            }
@@ -56,8 +56,9 @@ class TextCleaner:
         # Remove repeated punctuation (keep max 1)
         text = re.sub(r'([!?.,;:]){2,}', r'\1', text)
         
-        # Normalize spaces (multiple spaces to single)
-        text = re.sub(r' +', ' ', text)
+        # Normalize spaces (multiple spaces to single); single spaces are
+        # left alone so ordinary text isn't rebuilt piece by piece
+        text = re.sub(r' {2,}', ' ', text)
         
         # Normalize line breaks (multiple line breaks to double)
         text = re.sub(r'\n{3,}', '\n\n', text)
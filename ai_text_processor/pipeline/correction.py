@@ -1,9 +1,9 @@
-import json
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 import os
-from openai import OpenAI
 
 from config import config
+from pipeline.llm import llm, parse_json_reply
+from pipeline.tracing import tracer
 from pipeline.validator import ValidationResult
 
 
@@ -16,15 +16,15 @@ class Corrector:
     """
     
     def __init__(self):
-        """Initialize corrector with correction prompt."""
-        self.correction_prompt_template = self._load_correction_prompt()
-        self.client = None
-        
-        if config.OPENAI_API_KEY:
-            try:
-                self.client = OpenAI(api_key=config.OPENAI_API_KEY)
-            except Exception:
-                self.client = None
+        """Initialize corrector; the correction prompt is loaded on first use."""
+        self._correction_prompt_template: Optional[str] = None
+    
+    @property
+    def correction_prompt_template(self) -> str:
+        """Correction prompt template, read from file on first use."""
+        if self._correction_prompt_template is None:
+            self._correction_prompt_template = self._load_correction_prompt()
+        return self._correction_prompt_template
     
     def _load_correction_prompt(self) -> str:
         """Load correction prompt template from file."""
@@ -60,6 +60,16 @@ Original text:
         Returns:
             Corrected data or status with needs_review
         """
+        with tracer.span(
+            "correct",
+            **{"retry.attempt": retry_count + 1, "validation.errors": validation_result.errors},
+        ) as span:
+            result = self._retry(block, validation_result, retry_count)
+            span.set_attribute("correct.status", result.get("status") if isinstance(result, dict) else None)
+            return result
+    
+    def _retry(self, block: str, validation_result: ValidationResult, retry_count: int) -> Dict[str, Any]:
+        """Run one correction attempt."""
         if retry_count >= config.MAX_RETRIES:
             return {
                 "status": "needs_review",
@@ -77,7 +87,7 @@ Original text:
         )
         
         try:
-            if not self.client:
+            if not llm.available:
                 # Return mock for testing
                 return {
                     "status": "needs_review",
@@ -85,25 +95,12 @@ Original text:
                     "orders": []
                 }
             
-            response = self.client.chat.completions.create(
-                model=config.OPENAI_MODEL,
-                messages=[
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=config.TEMPERATURE,
-                top_p=config.TOP_P,
-                max_tokens=config.MAX_TOKENS
-            )
-            
-            content = response.choices[0].message.content.strip()
-            
-            # Remove markdown if present
-            content = content.replace('```json', '').replace('```', '').strip()
+            content = llm.complete("correct", [
+                {"role": "user", "content": prompt}
+            ])
             
             # Parse JSON
-            result = json.loads(content)
-            
-            return result
+            return parse_json_reply(content)
             
         except Exception as e:
             return {
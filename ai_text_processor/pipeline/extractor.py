@@ -1,9 +1,12 @@
-import json
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 import os
-from openai import OpenAI
 
 from config import config
+from pipeline.batcher import MicroBatcher
+from pipeline.circuit_breaker import CircuitOpenError
+from pipeline.llm import llm, parse_json_reply
+from pipeline.rules import RuleExtractor
+from pipeline.tracing import tracer
 
 
 class Extractor:
@@ -12,18 +15,40 @@ class Extractor:
     
     Loads system prompt from file.
     Uses deterministic settings (low temperature).
+    
+    Concurrent extract() calls (from all requests in the process) are
+    micro-batched: blocks arriving within EXTRACT_BATCH_WINDOW_SECONDS
+    go to the model as one numbered prompt, up to EXTRACT_BATCH_MAX_SIZE
+    blocks. Blocks missing from an unparsable or incomplete batch reply
+    are extracted one by one.
     """
     
+    # Appended to the system prompt for batched calls
+    BATCH_INSTRUCTIONS = """
+Batch mode:
+You will receive several numbered messages. Extract each message separately;
+never move an order from one message to another. Return one JSON object:
+{"results": [{"id": <message number>, "orders": [...]}, ...]}
+with exactly one entry per message."""
+    
     def __init__(self):
-        """Initialize the extractor with system prompt."""
-        self.system_prompt = self._load_system_prompt()
-        self.client = None
-        
-        if config.OPENAI_API_KEY:
-            try:
-                self.client = OpenAI(api_key=config.OPENAI_API_KEY)
-            except Exception:
-                self.client = None
+        """Initialize the extractor; the system prompt is loaded on first use."""
+        self._system_prompt: Optional[str] = None
+        self.batcher = MicroBatcher(
+            self._extract_batch,
+            window_seconds=config.EXTRACT_BATCH_WINDOW_SECONDS,
+            max_batch_size=min(
+                config.EXTRACT_BATCH_MAX_SIZE,
+                max(1, config.EXTRACT_BATCH_MAX_TOKENS // config.EXTRACT_BATCH_TOKENS_PER_BLOCK),
+            ),
+        )
+    
+    @property
+    def system_prompt(self) -> str:
+        """System prompt, read from file on first use."""
+        if self._system_prompt is None:
+            self._system_prompt = self._load_system_prompt()
+        return self._system_prompt
     
     def _load_system_prompt(self) -> str:
         """Load system prompt from file."""
@@ -52,8 +77,22 @@ Rules:
             block: Text block to extract from
             
         Returns:
-            Extracted data as dict
+            Extracted data as dict. While the LLM circuit is open, a
+            rule-based result with status "degraded".
         """
+        if not llm.available:
+            # Return mock response for testing without API key
+            return self._extract_mock(block)
+        
+        result = self.batcher.submit(block)
+        if result is None:
+            # The batch reply left this block out: extract it in this caller's
+            # thread, so the fallbacks of a failed batch run concurrently
+            return self._extract_one(block)
+        return result
+    
+    def _extract_one(self, block: str) -> Dict[str, Any]:
+        """Extract a single block with its own LLM call."""
         user_prompt = f"""Extract structured delivery order from this message:
 
 \"\"\"
@@ -62,31 +101,17 @@ Rules:
 """
         
         try:
-            if not self.client:
-                # Return mock response for testing without API key
-                return self._extract_mock(block)
-            
-            response = self.client.chat.completions.create(
-                model=config.OPENAI_MODEL,
-                messages=[
-                    {"role": "system", "content": self.system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                temperature=config.TEMPERATURE,
-                top_p=config.TOP_P,
-                max_tokens=config.MAX_TOKENS
-            )
-            
-            content = response.choices[0].message.content.strip()
-            
-            # Remove markdown code blocks if present
-            content = content.replace('```json', '').replace('```', '').strip()
+            content = llm.complete("extract", [
+                {"role": "system", "content": self.system_prompt},
+                {"role": "user", "content": user_prompt}
+            ])
             
             # Parse JSON
-            result = json.loads(content)
-            
-            return result
+            return parse_json_reply(content)
             
+        except CircuitOpenError:
+            # Backend unhealthy: answer immediately from rules
+            return RuleExtractor.extract(block)
         except Exception as e:
             # Return error structure
             return {
@@ -94,6 +119,67 @@ Rules:
                 "orders": []
             }
     
+    def _extract_batch(self, blocks: List[str]) -> List[Optional[Dict[str, Any]]]:
+        """
+        Extract several blocks with one LLM call (MicroBatcher handler).
+        
+        Args:
+            blocks: Text blocks, possibly from different requests
+            
+        Returns:
+            One extraction result per block, in order; None for a block
+            the reply was missing, which its caller then extracts alone
+        """
+        if len(blocks) == 1:
+            return [self._extract_one(blocks[0])]
+        
+        messages = "\n\n".join(
+            f'Message {i}:\n"""\n{block}\n"""' for i, block in enumerate(blocks, 1)
+        )
+        user_prompt = f"Extract structured delivery orders from each of these {len(blocks)} messages:\n\n{messages}\n"
+        
+        results: List[Optional[Dict[str, Any]]] = [None] * len(blocks)
+        with tracer.span("extract_batch", **{"batch.size": len(blocks)}) as span:
+            try:
+                content = llm.complete("extract_batch", [
+                    {"role": "system", "content": self.system_prompt + "\n" + self.BATCH_INSTRUCTIONS},
+                    {"role": "user", "content": user_prompt}
+                ], max_tokens=self.batch_max_tokens(len(blocks)))
+                results = self._parse_batch(content, len(blocks))
+            except CircuitOpenError:
+                return [RuleExtractor.extract(block) for block in blocks]
+            except Exception as e:
+                # Provider error or unparsable reply: every block falls back to its own call
+                span.set_attribute("batch.error", str(e))
+            
+            missing = sum(1 for result in results if result is None)
+            span.set_attribute("batch.fallback", missing)
+        
+        if missing:
+            self.batcher.record_fallback(missing)
+        return results
+    
+    @staticmethod
+    def batch_max_tokens(size: int) -> int:
+        """Output token limit for a batch of `size` blocks."""
+        return min(
+            max(config.MAX_TOKENS, config.EXTRACT_BATCH_TOKENS_PER_BLOCK * size),
+            config.EXTRACT_BATCH_MAX_TOKENS,
+        )
+    
+    @classmethod
+    def _parse_batch(cls, content: str, count: int) -> List[Optional[Dict[str, Any]]]:
+        """Per-message results from a batch reply; None where a message is missing or malformed."""
+        data = parse_json_reply(content)
+        results: List[Optional[Dict[str, Any]]] = [None] * count
+        for entry in data.get("results", []) if isinstance(data, dict) else []:
+            if not isinstance(entry, dict) or not isinstance(entry.get("orders"), list):
+                continue
+            index = entry.get("id")
+            if isinstance(index, int) and 1 <= index <= count and results[index - 1] is None:
+                results[index - 1] = {key: value for key, value in entry.items() if key != "id"}
+        return results
+    
     def _extract_mock(self, block: str) -> Dict[str, Any]:
         """Mock extraction for testing without API key."""
         import re
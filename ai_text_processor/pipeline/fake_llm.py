@@ -0,0 +1,20 @@
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List
+
+
+def completion(content: str) -> Any:
+    """Chat completion response carrying `content`, shaped like the OpenAI SDK's."""
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+def fake_client(reply: Callable[..., str]) -> Any:
+    """
+    Stand-in for the OpenAI client, for tests and benchmarks.
+
+    chat.completions.create(messages=..., **params) answers with
+    reply(messages, **params); reply may raise to simulate a failed call.
+    """
+    def create(messages: List[Dict[str, str]], **params: Any) -> Any:
+        return completion(reply(messages, **params))
+
+    return SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
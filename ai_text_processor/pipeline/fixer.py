@@ -1,6 +1,5 @@
 import re
 from typing import Dict, Any
-import copy
 
 
 class AutoFixer:
@@ -18,33 +17,57 @@ class AutoFixer:
         """
         Apply deterministic fixes to data.
         
+        Copy-on-write: the input is never modified. Orders that need no
+        fix are shared with it, and if nothing needs fixing the input
+        itself is returned.
+        
         Args:
             data: Data to fix
             
         Returns:
             Fixed data
         """
-        # Deep copy to avoid modifying original
-        fixed_data = copy.deepcopy(data)
-        
-        if 'orders' not in fixed_data or not isinstance(fixed_data['orders'], list):
-            return fixed_data
+        if 'orders' not in data or not isinstance(data['orders'], list):
+            return data
         
-        for order in fixed_data['orders']:
+        orders = data['orders']
+        fixed_orders = None
+        for index, order in enumerate(orders):
             if not isinstance(order, dict):
                 continue
             
-            # Fix phone
-            order['phone'] = cls._fix_phone(order.get('phone'))
-            
-            # Fix quantity from item text
-            if order.get('quantity') is None and order.get('item'):
-                order['quantity'] = cls._extract_quantity_from_item(order['item'])
-        
-        return fixed_data
+            fixed = cls._fix_order(order)
+            if fixed is not order:
+                if fixed_orders is None:
+                    fixed_orders = list(orders)
+                fixed_orders[index] = fixed
+        
+        if fixed_orders is None:
+            return data
+        return {**data, 'orders': fixed_orders}
+    
+    @classmethod
+    def _fix_order(cls, order: Dict[str, Any]) -> Dict[str, Any]:
+        """Fixed copy of an order, or the order itself if nothing changes."""
+        changes: Dict[str, Any] = {}
+        
+        # Fix phone
+        phone = cls.fix_phone(order.get('phone'))
+        if 'phone' not in order or order['phone'] != phone:
+            changes['phone'] = phone
+        
+        # Fix quantity from item text
+        if order.get('quantity') is None and order.get('item'):
+            quantity = cls.extract_quantity_from_item(order['item'])
+            if 'quantity' not in order or quantity is not None:
+                changes['quantity'] = quantity
+        
+        if not changes:
+            return order
+        return {**order, **changes}
     
     @classmethod
-    def _fix_phone(cls, phone: Any) -> Any:
+    def fix_phone(cls, phone: Any) -> Any:
         """
         Fix common phone number issues.
         
@@ -80,7 +103,7 @@ class AutoFixer:
         return None
     
     @classmethod
-    def _extract_quantity_from_item(cls, item: str) -> Any:
+    def extract_quantity_from_item(cls, item: str) -> Any:
         """
         Extract quantity from item text.
         
@@ -96,9 +119,11 @@ class AutoFixer:
         item_lower = item.lower()
         
         # Try to extract numbers followed by "pc", "pcs", "piece", etc.
+        # (?<!\d) starts matches only at the beginning of a digit run, so long
+        # digit runs don't make the search quadratic
         patterns = [
-            r'(\d+)\s*(?:pc|pcs|piece|pieces)',
-            r'(\d+)\s*(?:ta|ti|taa)',  # Bangla: "ta", "ti"
+            r'(?<!\d)(\d+)\s*(?:pc|pcs|piece|pieces)',
+            r'(?<!\d)(\d+)\s*(?:ta|ti|taa)',  # Bangla: "ta", "ti"
         ]
         
         for pattern in patterns:
@@ -0,0 +1,240 @@
+import contextvars
+import json
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from config import config
+from pipeline.admission import llm_limiter
+from pipeline.cassette import Cassette, CassetteMiss, RecordedError
+from pipeline.circuit_breaker import CircuitBreaker
+from pipeline.tracing import tracer
+
+
+def _interned_object(pairs: List[Tuple[str, Any]]) -> Dict[str, Any]:
+    # Every order repeats the same keys; share one copy of each across replies
+    return {sys.intern(key): value for key, value in pairs}
+
+
+def parse_json_reply(content: str) -> Any:
+    """Parse a JSON reply, ignoring markdown code fences around it."""
+    # Remove markdown code blocks if present
+    content = content.replace('```json', '').replace('```', '').strip()
+    return json.loads(content, object_pairs_hook=_interned_object)
+
+
+def is_backend_failure(error: BaseException) -> bool:
+    """
+    True if an LLM call error says the backend is unhealthy: a timeout,
+    a connection error, 429 or 5xx. Other errors (e.g. a 400 for an
+    oversized prompt) are about the request and don't count.
+    """
+    if isinstance(error, RecordedError):
+        return error.backend_failure
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    # An openai error means openai is already imported
+    openai = sys.modules.get("openai")
+    if openai is not None:
+        if isinstance(error, openai.APIConnectionError):  # includes APITimeoutError
+            return True
+        if isinstance(error, openai.APIStatusError):
+            return error.status_code == 429 or error.status_code >= 500
+    return False
+
+
+class CallCounter:
+    """LLM calls sent while a count_calls() context was active."""
+
+    __slots__ = ("calls",)
+
+    def __init__(self):
+        self.calls = 0
+
+
+_call_counter: contextvars.ContextVar[Optional[CallCounter]] = contextvars.ContextVar(
+    "llm_call_counter", default=None
+)
+
+
+@contextmanager
+def count_calls() -> Iterator[CallCounter]:
+    """
+    Count the LLM calls made in this context.
+
+    A micro-batched call is counted once, in the context of the caller
+    that sent the batch.
+    """
+    counter = CallCounter()
+    token = _call_counter.set(counter)
+    try:
+        yield counter
+    finally:
+        _call_counter.reset(token)
+
+
+class LLMClient:
+    """
+    Shared chat-completion client for the extractor and corrector.
+
+    Every call goes through the circuit breaker and the process-wide
+    LLM limiter, and can be recorded to or replayed from a cassette
+    (LLM_CASSETTE_MODE).
+
+    The openai package is imported and the client built on first use,
+    so importing the pipeline stays cheap.
+    """
+
+    def __init__(self):
+        """Initialize the circuit breaker and optional cassette; the OpenAI client is deferred."""
+        self._client: Optional[Any] = None
+        self._client_loaded = False
+        self._client_lock = threading.Lock()
+        self.cassette = None
+        self.breaker = CircuitBreaker(
+            window_size=config.BREAKER_WINDOW_SIZE,
+            min_calls=config.BREAKER_MIN_CALLS,
+            failure_rate=config.BREAKER_FAILURE_RATE,
+            slow_call_seconds=config.BREAKER_SLOW_CALL_SECONDS,
+            slow_call_rate=config.BREAKER_SLOW_CALL_RATE,
+            open_seconds=config.BREAKER_OPEN_SECONDS,
+        )
+
+        if config.LLM_CASSETTE_MODE:
+            self.cassette = Cassette(
+                config.LLM_CASSETTE_PATH,
+                config.LLM_CASSETTE_MODE,
+                replay_latency=config.LLM_CASSETTE_REPLAY_LATENCY,
+            )
+
+    @property
+    def client(self) -> Optional[Any]:
+        """OpenAI client, created on first access (None without an API key)."""
+        if not self._client_loaded:
+            with self._client_lock:
+                if not self._client_loaded:
+                    self._client = self._create_client()
+                    self._client_loaded = True
+        return self._client
+
+    @client.setter
+    def client(self, value: Optional[Any]) -> None:
+        self._client = value
+        self._client_loaded = True
+
+    def _create_client(self) -> Optional[Any]:
+        if not config.OPENAI_API_KEY:
+            return None
+        try:
+            from openai import OpenAI
+
+            return OpenAI(
+                api_key=config.OPENAI_API_KEY,
+                timeout=config.LLM_TIMEOUT_SECONDS,
+                # Retries are the caller's call; the SDK's own would hide failures from the breaker
+                max_retries=0,
+            )
+        except Exception:
+            return None
+
+    def warm_up(self, connect: bool = False) -> None:
+        """Build the client and, optionally, open a connection to the API."""
+        client = self.client
+        if connect and client is not None and not self.replaying:
+            try:
+                client.models.list()
+            except Exception:
+                # Warm-up is best effort; real calls report their own errors
+                pass
+
+    @property
+    def replaying(self) -> bool:
+        return self.cassette is not None and self.cassette.mode == Cassette.REPLAY
+
+    @property
+    def available(self) -> bool:
+        """True if calls can be answered (live client or cassette replay)."""
+        return self.client is not None or self.replaying
+
+    def complete(self, kind: str, messages: List[Dict[str, str]], max_tokens: Optional[int] = None) -> str:
+        """
+        Run one chat completion and return the message content.
+
+        Args:
+            kind: Call site, "extract" or "correct" (stored in cassettes)
+            messages: Chat messages
+            max_tokens: Output token limit (default config.MAX_TOKENS)
+
+        Returns:
+            Stripped response content
+
+        Raises:
+            CircuitOpenError: The backend is unhealthy; nothing was sent
+        """
+        params: Dict[str, Any] = {
+            "model": config.OPENAI_MODEL,
+            "temperature": config.TEMPERATURE,
+            "top_p": config.TOP_P,
+            "max_tokens": max_tokens or config.MAX_TOKENS,
+        }
+
+        with tracer.span("llm", **{"llm.kind": kind, "llm.model": config.OPENAI_MODEL}) as span:
+            self.breaker.before_call()
+            counter = _call_counter.get()
+            if counter is not None:
+                counter.calls += 1
+            content = self._complete(kind, messages, params)
+            span.set_attribute("llm.response_length", len(content))
+            return content
+
+    def _complete(self, kind: str, messages: List[Dict[str, str]], params: Dict[str, Any]) -> str:
+        """
+        Replay, or call the API (recording if a cassette is set), and
+        report the outcome to the breaker. Only the provider call is
+        timed; waiting for an LLM limiter slot is not backend latency.
+        """
+        if self.replaying:
+            start_time = time.time()
+            try:
+                content = self.cassette.replay(messages, params)
+            except Exception as e:
+                self._record_failure(e, time.time() - start_time)
+                raise
+            self.breaker.record(True, time.time() - start_time)
+            return content.strip()
+
+        with llm_limiter.slot():
+            start_time = time.time()
+            try:
+                response = self.client.chat.completions.create(messages=messages, **params)
+                content = response.choices[0].message.content
+            except Exception as e:
+                latency = time.time() - start_time
+                self._record_failure(e, latency)
+                if self.cassette is not None:
+                    self.cassette.record(
+                        kind, messages, params, None, latency,
+                        error=str(e), backend_failure=is_backend_failure(e),
+                    )
+                raise
+            latency = time.time() - start_time
+
+        self.breaker.record(True, latency)
+        if self.cassette is not None:
+            self.cassette.record(kind, messages, params, content, latency)
+
+        return content.strip()
+
+    def _record_failure(self, error: Exception, latency: float) -> None:
+        """Report a failed call to the breaker; only backend failures count against it."""
+        if isinstance(error, CassetteMiss):
+            self.breaker.cancel()
+        else:
+            # A request error is still an answer from a healthy backend
+            self.breaker.record(not is_backend_failure(error), latency)
+
+
+# Singleton instance
+llm = LLMClient()
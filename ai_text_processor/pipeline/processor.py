@@ -1,16 +1,37 @@
-from typing import Dict, List, Any
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Dict, List, Any, Optional, Set, Tuple
+import contextvars
+import threading
 import time
 
+from config import config
+
 from pipeline.cleaner import TextCleaner
-from pipeline.batch_splitter import BatchSplitter
+from pipeline.segmenter import build_splitter
 from pipeline.extractor import extractor
-from pipeline.validator import validator
+from pipeline.validator import ValidationResult, validator
 from pipeline.fixer import fixer
 from pipeline.correction import corrector
+from pipeline.llm import count_calls, llm
+from pipeline.admission import RequestTooLarge, check_input_size
+from pipeline.sessions import SessionStore, fingerprint
+from pipeline.tracing import tracer
 
 
 class ProcessingResult:
-    """Result of processing a text block with debug checkpoints."""
+    """
+    Result of processing a text block with debug checkpoints.
+
+    Checkpoints are references, not copies: when a stage changes
+    nothing, its checkpoint is the previous stage's dict, and the
+    auto-fixer shares unchanged orders with the raw output.
+    """
+
+    __slots__ = (
+        "block", "raw_output", "auto_fixed_output", "final_output",
+        "retry_count", "errors", "degraded", "needs_review", "llm_calls",
+    )
 
     def __init__(
         self,
@@ -27,46 +48,256 @@ class ProcessingResult:
         self.final_output = final_output
         self.retry_count = retry_count
         self.errors = errors or []
-        self.needs_review = final_output.get("status") == "needs_review"
+        self.degraded = final_output.get("status") == "degraded"
+        self.needs_review = final_output.get("status") == "needs_review" or self.degraded
+        self.llm_calls = 0
+
+    @property
+    def reusable(self) -> bool:
+        """True if the final result passed validation, so a resubmit may reuse it."""
+        return not self.needs_review and not self.errors
 
 
 class TextProcessor:
     """Main processing orchestrator."""
 
-    def __init__(self):
+    def __init__(self, max_workers: int = config.MAX_CONCURRENT_LLM_CALLS):
         self.cleaner = TextCleaner()
-        self.splitter = BatchSplitter()
+        self.splitter = build_splitter()
+        self.max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        self.sessions = SessionStore(config.SESSION_MAX_COUNT, config.SESSION_TTL_SECONDS)
+        self.ready = threading.Event()
+        self.warm_up_seconds: Optional[float] = None
 
-    def process_text(self, raw_text: str) -> Dict[str, Any]:
-        """Process raw text through the full pipeline."""
+    def process_text(
+        self,
+        raw_text: str,
+        max_blocks: Optional[int] = None,
+        session_token: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Process raw text through the full pipeline.
+
+        With the session_token of an earlier response, only blocks whose
+        cleaned text changed are reprocessed; the rest reuse their earlier
+        results. The response carries the token for the next resubmit.
+        """
         start_time = time.time()
 
-        cleaned = self.cleaner.clean(raw_text)
-        blocks = self.splitter.split(cleaned)
+        with tracer.span("process_text", **{"input.length": len(raw_text)}) as span:
+            blocks = self.split_blocks(raw_text, max_blocks)
+            fingerprints = [fingerprint(block) for block in blocks]
+            session = self.sessions.get(session_token)
+            # A known session keeps its token even if none of its blocks could be reused
+            previous = session if session is not None else {}
 
-        all_results: List[ProcessingResult] = []
-        total_retry_count = 0
+            results = self.process_blocks(blocks, previous)
+            # Reused results made no calls in this request
+            counted = {id(result) for result in previous.values()}
+            response = self.build_response(blocks, results, time.time() - start_time, counted)
+
+            reused_blocks = sum(1 for value in fingerprints if value in previous)
+            token = self.sessions.save(
+                session_token if session is not None else None,
+                {
+                    value: result
+                    for value, result in zip(fingerprints, results)
+                    if result.reusable
+                },
+            )
+            response["session"] = {
+                "token": token,
+                "block_fingerprints": fingerprints,
+                "reused_blocks": reused_blocks,
+            }
+
+            span.set_attribute("blocks.count", len(blocks))
+            span.set_attribute("blocks.reused", reused_blocks)
+            span.set_attribute("retry_count", response["retry_count"])
+            span.set_attribute("needs_review", response["needs_review"])
+            return response
+
+    def process_texts(
+        self,
+        messages: List[Tuple[str, str]],
+        max_blocks: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        max_total_blocks: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        Process many independent messages in one call.
+
+        All blocks share one scheduler, and identical blocks across
+        messages are extracted only once.
 
-        for block in blocks:
-            result = self._process_block(block)
-            all_results.append(result)
-            total_retry_count += result.retry_count
+        Args:
+            messages: (message_id, raw_text) pairs
+            max_blocks: Per-message block limit
+            max_bytes: Per-message input size limit
+            max_total_blocks: Limit on blocks across all messages
 
+        Returns:
+            Per-message results in input order. A message that fails
+            carries an "error" instead of a "result".
+
+        Raises:
+            RequestTooLarge: The messages hold more than max_total_blocks blocks
+        """
+        with tracer.span("process_texts", **{"messages.count": len(messages)}) as span:
+            start_time = time.time()
+
+            message_blocks: List[Optional[List[str]]] = []
+            items: List[Dict[str, Any]] = []
+            all_blocks: List[str] = []
+
+            for message_id, raw_text in messages:
+                try:
+                    if max_bytes is not None:
+                        check_input_size(raw_text, max_bytes)
+                    blocks = self.split_blocks(raw_text, max_blocks)
+                except Exception as e:
+                    message_blocks.append(None)
+                    items.append({"id": message_id, "error": str(e)})
+                    continue
+                message_blocks.append(blocks)
+                items.append({"id": message_id})
+                all_blocks.extend(blocks)
+
+            if max_total_blocks is not None and len(all_blocks) > max_total_blocks:
+                raise RequestTooLarge(
+                    "too_many_blocks",
+                    f"Batch has {len(all_blocks)} blocks, limit is {max_total_blocks}",
+                )
+
+            pending = deque(self.process_blocks(all_blocks))
+
+            # Blocks shared between messages count their calls in the first message only
+            counted: Set[int] = set()
+            for item, blocks in zip(items, message_blocks):
+                if blocks is None:
+                    continue
+                results = [pending.popleft() for _ in blocks]
+                item["result"] = self.build_response(blocks, results, time.time() - start_time, counted)
+
+            processing_time = time.time() - start_time
+
+            span.set_attribute("blocks.count", len(all_blocks))
+            return {
+                "results": items,
+                "messages_processed": len(items),
+                "blocks_processed": len(all_blocks),
+                "unique_blocks": len(set(all_blocks)),
+                "processing_time": f"{processing_time:.2f}s",
+                "processing_time_seconds": round(processing_time, 3),
+            }
+
+    def split_blocks(self, raw_text: str, max_blocks: Optional[int] = None) -> List[str]:
+        """Clean raw text and split it into blocks."""
+        with tracer.span("clean"):
+            cleaned = self.cleaner.clean(raw_text)
+        with tracer.span("split") as span:
+            blocks = self.splitter.split(cleaned)
+            span.set_attribute("blocks.count", len(blocks))
+
+        if max_blocks is not None and len(blocks) > max_blocks:
+            raise RequestTooLarge(
+                "too_many_blocks",
+                f"Input has {len(blocks)} blocks, limit is {max_blocks}",
+            )
+
+        return blocks
+
+    def process_blocks(
+        self,
+        blocks: List[str],
+        reuse: Optional[Dict[str, ProcessingResult]] = None,
+    ) -> List[ProcessingResult]:
+        """
+        Process blocks concurrently on the shared executor.
+
+        Identical blocks are processed once and share a result. Blocks
+        whose fingerprint is in `reuse` are not processed again.
+        Results are returned in block order.
+
+        At most twice max_workers blocks are queued at a time: each
+        pending Future costs more memory than the result it carries,
+        and more queued work would not finish any sooner.
+        """
+        by_block: Dict[str, ProcessingResult] = {}
+        if reuse:
+            for block in blocks:
+                cached = reuse.get(fingerprint(block))
+                if cached is not None:
+                    by_block[block] = cached
+
+        unique_blocks = [block for block in dict.fromkeys(blocks) if block not in by_block]
+
+        if len(unique_blocks) <= 1:
+            by_block.update((block, self._process_block_safely(block)) for block in unique_blocks)
+        else:
+            executor = self._get_executor()
+            max_pending = self.max_workers * 2
+            running: Dict[Future, str] = {}
+            for block in unique_blocks:
+                if len(running) >= max_pending:
+                    self._collect_finished(running, by_block)
+                # Each block runs in a copy of the caller's context so its span nests under the request
+                future = executor.submit(contextvars.copy_context().run, self._process_block_safely, block)
+                running[future] = block
+            while running:
+                self._collect_finished(running, by_block)
+
+        return [by_block[block] for block in blocks]
+
+    @staticmethod
+    def _collect_finished(running: Dict[Future, str], by_block: Dict[str, ProcessingResult]) -> None:
+        """Wait for at least one running block and move finished ones into by_block."""
+        done, _ = wait(running, return_when=FIRST_COMPLETED)
+        for future in done:
+            by_block[running.pop(future)] = future.result()
+
+    def build_response(
+        self,
+        blocks: List[str],
+        all_results: List[ProcessingResult],
+        processing_time: float,
+        counted: Optional[Set[int]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Aggregate block results into the /process-text response shape.
+
+        llm_calls and retry_count count each result object once; results
+        whose id() is already in `counted` are skipped, and the ids of
+        the results counted here are added to it.
+        """
+        if counted is None:
+            counted = set()
+        total_retry_count = 0
+        llm_calls = 0
         all_orders: List[Dict[str, Any]] = []
         all_errors: List[str] = []
         needs_review_count = 0
+        degraded_count = 0
 
         debug_raw = []
         debug_auto_fix = []
         debug_final = []
 
         for index, result in enumerate(all_results):
+            if id(result) not in counted:
+                counted.add(id(result))
+                total_retry_count += result.retry_count
+                llm_calls += result.llm_calls
             if result.final_output.get("orders"):
                 all_orders.extend(result.final_output["orders"])
             if result.errors:
                 all_errors.extend(result.errors)
             if result.needs_review:
                 needs_review_count += 1
+            if result.degraded:
+                degraded_count += 1
 
             debug_raw.append(
                 {
@@ -92,16 +323,15 @@ class TextProcessor:
                 }
             )
 
-        end_time = time.time()
-        processing_time = end_time - start_time
-
         return {
             "results": {"orders": all_orders},
             "processing_time": f"{processing_time:.2f}s",
             "processing_time_seconds": round(processing_time, 3),
             "retry_count": total_retry_count,
             "blocks_processed": len(blocks),
+            "llm_calls": llm_calls,
             "needs_review": needs_review_count > 0,
+            "degraded": degraded_count > 0,
             "errors": all_errors if all_errors else None,
             "debug": {
                 "raw_ai_extraction_output": debug_raw,
@@ -110,12 +340,96 @@ class TextProcessor:
             },
         }
 
+    def warm_up(self, connect: bool = False) -> None:
+        """
+        Load prompts, build the LLM client and start the block executor
+        ahead of the first request, then mark the processor ready.
+
+        Args:
+            connect: Also open a connection to the LLM API
+        """
+        start_time = time.time()
+        try:
+            extractor.system_prompt
+            corrector.correction_prompt_template
+            llm.warm_up(connect)
+            self._get_executor()
+        finally:
+            self.warm_up_seconds = round(time.time() - start_time, 3)
+            self.ready.set()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Shared block executor, created on first use."""
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="block",
+                )
+            return self._executor
+
+    def _process_block_safely(self, block: str) -> ProcessingResult:
+        """Process a block, turning unexpected failures into a needs_review result."""
+        with count_calls() as counter:
+            try:
+                result = self._process_block(block)
+            except Exception as e:
+                error = f"Block processing failed: {str(e)}"
+                failed_output = {"status": "needs_review", "errors": [error], "orders": []}
+                result = ProcessingResult(
+                    block=block,
+                    raw_output=failed_output,
+                    auto_fixed_output=failed_output,
+                    final_output=failed_output,
+                    retry_count=0,
+                    errors=[error],
+                )
+        result.llm_calls = counter.calls
+        return result
+
     def _process_block(self, block: str) -> ProcessingResult:
-        """Process a single text block."""
+        """Process a single text block, traced as one "block" span."""
+        with tracer.span("block", **{"block.length": len(block)}) as span:
+            result = self._run_block_stages(block)
+            span.set_attribute("block.retry_count", result.retry_count)
+            span.set_attribute("block.needs_review", result.needs_review)
+            span.set_attribute("block.validation_errors", result.errors)
+            return result
+
+    def _validate(self, data: Dict[str, Any]) -> ValidationResult:
+        """Validate inside a "validate" span."""
+        with tracer.span("validate") as span:
+            result = validator.validate(data)
+            span.set_attribute("validation.is_valid", result.is_valid)
+            span.set_attribute("validation.errors", result.errors)
+            return result
+
+    def _degraded_result(self, block: str, raw_output: Dict[str, Any]) -> ProcessingResult:
+        """Fix and validate a rule-based result; the correction loop is skipped while the LLM is down."""
+        with tracer.span("fix"):
+            auto_fixed_output = fixer.auto_fix(raw_output)
+        validated = self._validate(auto_fixed_output)
+
+        return ProcessingResult(
+            block=block,
+            raw_output=raw_output,
+            auto_fixed_output=auto_fixed_output,
+            final_output=auto_fixed_output,
+            retry_count=0,
+            errors=validated.errors,
+        )
+
+    def _run_block_stages(self, block: str) -> ProcessingResult:
+        """Extract, validate, fix and correct a single text block."""
         retry_count = 0
 
-        raw_output = extractor.extract(block)
-        validated = validator.validate(raw_output)
+        with tracer.span("extract"):
+            raw_output = extractor.extract(block)
+
+        if raw_output.get("status") == "degraded":
+            return self._degraded_result(block, raw_output)
+
+        validated = self._validate(raw_output)
 
         if validated.is_valid:
             return ProcessingResult(
@@ -127,8 +441,9 @@ class TextProcessor:
                 errors=[],
             )
 
-        auto_fixed_output = fixer.auto_fix(raw_output)
-        revalidated = validator.validate(auto_fixed_output)
+        with tracer.span("fix"):
+            auto_fixed_output = fixer.auto_fix(raw_output)
+        revalidated = self._validate(auto_fixed_output)
 
         if revalidated.is_valid:
             return ProcessingResult(
@@ -142,12 +457,12 @@ class TextProcessor:
 
         corrected = corrector.retry(block, revalidated, retry_count)
         retry_count += 1
-        final_validated = validator.validate(corrected)
+        final_validated = self._validate(corrected)
 
         if not final_validated.is_valid and retry_count < 2:
             corrected = corrector.retry(block, final_validated, retry_count)
             retry_count += 1
-            final_validated = validator.validate(corrected)
+            final_validated = self._validate(corrected)
 
         return ProcessingResult(
             block=block,
@@ -0,0 +1,90 @@
+import re
+from typing import Any, Dict, List
+
+from pipeline.fixer import AutoFixer
+from pipeline.segmenter import Segmenter
+
+
+class RuleExtractor:
+    """
+    Rule-based extraction used in degraded mode (LLM unavailable).
+
+    Reuses the segmenter's line features: the phone from the phone
+    pattern, the name from a name-like line or the words before the
+    phone, the address and item from keyword matches. Results are
+    marked "degraded" and should be reviewed.
+    """
+
+    NAME_PREFIX_PATTERN = re.compile(r'^\s*(?:amar\s+)?(?:name|nam|naam)\s*[:\-]?\s*', re.IGNORECASE)
+    ADDRESS_PREFIX_PATTERN = re.compile(r'^\s*(?:address|addr|thikana)\s*[:\-]?\s*', re.IGNORECASE)
+    PHONE_PREFIX_PATTERN = re.compile(r'^\s*(?:phone|mobile|number|num)\s*[:\-]?\s*', re.IGNORECASE)
+
+    @classmethod
+    def extract(cls, block: str) -> Dict[str, Any]:
+        """
+        Extract one order from a block without the LLM.
+
+        Args:
+            block: Text block
+
+        Returns:
+            Data in the extraction schema with status "degraded"
+        """
+        phone_match = Segmenter.PHONE_PATTERN.search(block)
+        phone = AutoFixer.fix_phone(phone_match.group(0)) if phone_match else None
+
+        name = None
+        address = None
+        item = None
+
+        for segment in cls._segments(block):
+            is_item = bool(Segmenter.ITEM_PATTERN.search(segment))
+            is_address = bool(Segmenter.ADDRESS_PATTERN.search(segment))
+
+            if name is None and Segmenter.is_name_like(segment, is_address, is_item):
+                name = cls.NAME_PREFIX_PATTERN.sub('', segment).strip(' :,.') or None
+                continue
+
+            if is_address and is_item:
+                # "Mirpur 10 black shirt 2pc": address first, then the item
+                item_start = Segmenter.ITEM_PATTERN.search(segment).start()
+                head, tail = segment[:item_start], segment[item_start:]
+                if Segmenter.ADDRESS_PATTERN.search(head):
+                    address = address or head.strip(' :,.')
+                    item = item or tail.strip(' :,.')
+                    continue
+
+            if address is None and is_address and not is_item:
+                address = cls.ADDRESS_PREFIX_PATTERN.sub('', segment).strip(' :,.') or None
+            elif item is None and is_item:
+                item = segment.strip(' :,.')
+
+        quantity = AutoFixer.extract_quantity_from_item(item) if item else None
+
+        return {
+            "status": "degraded",
+            "orders": [
+                {
+                    "customer_name": name,
+                    "phone": phone,
+                    "address": address,
+                    "item": item,
+                    "quantity": quantity,
+                    "notes": None,
+                }
+            ],
+        }
+
+    @classmethod
+    def _segments(cls, block: str) -> List[str]:
+        """Lines of the block, with each phone cut out (text before and after become segments)."""
+        segments: List[str] = []
+        for line in block.split('\n'):
+            line = cls.PHONE_PREFIX_PATTERN.sub('', line.strip())
+            for part in Segmenter.PHONE_PATTERN.split(line):
+                # split() also yields the optional +88 group
+                if part and not re.fullmatch(r'\+?88', part):
+                    part = part.strip(' ,.;')
+                    if part:
+                        segments.extend(p.strip() for p in re.split(r'[,;]', part) if p.strip())
+        return segments
@@ -0,0 +1,253 @@
+import re
+from typing import List
+
+from config import config
+from pipeline.batch_splitter import BatchSplitter
+
+
+class LineFeatures:
+    """Order-related features of a single line."""
+
+    __slots__ = ("text", "phones", "is_blank", "is_name", "is_address", "is_item")
+
+    def __init__(self, text: str, phones: int, is_name: bool, is_address: bool, is_item: bool):
+        self.text = text
+        self.phones = phones
+        self.is_blank = not text.strip()
+        self.is_name = is_name
+        self.is_address = is_address
+        self.is_item = is_item
+
+    @property
+    def is_header(self) -> bool:
+        """Line that typically opens an order (name or address, no items)."""
+        return (self.is_name or self.is_address) and not self.is_item and self.phones == 0
+
+    @property
+    def is_order_content(self) -> bool:
+        return self.phones > 0 or self.is_address or self.is_item
+
+
+class Segmenter:
+    """
+    Group lines into order-shaped blocks.
+
+    Uses line-level features (phones, name-like lines, address keywords,
+    item/quantity patterns) so that every block holds one order:
+
+    - Each block owns exactly one phone line.
+    - Text before the first phone belongs to the first order.
+    - Text between two phones is split at the last blank line, or else
+      the header lines (name/address) right before the next phone go
+      with the next order when orders are written header-first.
+    - Without phones, paragraphs that carry no order content (greetings,
+      a bare name) are merged into a neighbour instead of becoming
+      separate LLM calls.
+    """
+
+    PHONE_PATTERN = BatchSplitter.PHONE_PATTERN
+
+    NAME_KEYWORD_PATTERN = re.compile(r'^\s*(?:amar\s+)?(?:name|nam|naam)\b', re.IGNORECASE)
+    NAME_WORD_PATTERN = re.compile(r'^[A-Za-zঀ-৿.]+$')
+
+    ADDRESS_PATTERN = re.compile(
+        r'\b(?:address|addr|thikana|road|rd|house|flat|sector|block|lane|para|thana|upazila|'
+        r'district|zilla|bazar|more|dhaka|mirpur|uttara|dhanmondi|gulshan|banani|mohammadpur|'
+        r'badda|rampura|motijheel|farmgate|savar|gazipur|narayanganj|chittagong|chattogram|ctg|'
+        r'sylhet|khulna|rajshahi|barisal|barishal|rangpur|comilla|cumilla|mymensingh|bogura|'
+        r'jessore|jashore|cox)\b',
+        re.IGNORECASE,
+    )
+
+    ITEM_PATTERN = re.compile(
+        # (?<!\d) anchors at the start of a digit run, keeping long digit runs linear
+        r'(?<!\d)\d+\s*(?:pc|pcs|piece|pieces|ta|ti|taa|kg|gm|set|pair|box)\b|'
+        r'\b(?:ekta|ekti|duita|duiti|tinta|tinti|charta|charti|panchta|panchti|'
+        r'shirt|t-shirt|tshirt|panjabi|punjabi|saree|sari|pant|pants|jeans|shoe|shoes|dress|'
+        r'kurti|three-piece|borka|hijab|bag|watch|lagbe|chai|order)\b',
+        re.IGNORECASE,
+    )
+
+    # Chat filler that looks like a short name but is not one
+    FILLER_WORDS = {
+        'bhai', 'vai', 'apu', 'apa', 'ok', 'okay', 'thanks', 'thank', 'hi', 'hello',
+        'pls', 'please', 'salam', 'assalamualaikum', 'phone', 'mobile', 'number',
+    }
+
+    MAX_HEADER_LINES = 3
+
+    # Characters before a phone searched for the customer's name
+    NAME_WINDOW = 64
+
+    @classmethod
+    def split(cls, text: str) -> List[str]:
+        """
+        Split text into order-shaped blocks.
+
+        Args:
+            text: Cleaned text
+
+        Returns:
+            List of text blocks
+        """
+        if not text or not text.strip():
+            return []
+
+        lines = cls._features(cls._split_lines(text))
+        anchors = [i for i, line in enumerate(lines) if line.phones > 0]
+
+        if len(anchors) == 1:
+            return [text.strip()]
+        if not anchors:
+            return cls._split_paragraphs(lines) or [text.strip()]
+
+        # Orders written "name, address, phone" leave header lines before the first phone;
+        # later orders are assumed to follow the same layout. Greetings and other chat
+        # before the first order are not header lines.
+        header_lines = min(
+            sum(1 for line in lines[:anchors[0]] if line.is_header),
+            cls.MAX_HEADER_LINES,
+        )
+
+        starts = [0]
+        for previous, current in zip(anchors, anchors[1:]):
+            starts.append(cls._boundary(lines, previous, current, header_lines))
+
+        blocks = []
+        for start, end in zip(starts, starts[1:] + [len(lines)]):
+            block = "\n".join(line.text for line in lines[start:end]).strip()
+            if block:
+                blocks.append(block)
+        return blocks
+
+    @classmethod
+    def _split_lines(cls, text: str) -> List[str]:
+        """Split into lines, breaking lines that hold several phones into one line per phone."""
+        result = []
+        for line in text.split('\n'):
+            matches = list(cls.PHONE_PATTERN.finditer(line))
+            if len(matches) < 2:
+                result.append(line)
+                continue
+
+            cut_points = [
+                max(cls._cut_before_phone(line, match.start()), previous.end())
+                for previous, match in zip(matches, matches[1:])
+            ]
+            start = 0
+            for cut in cut_points:
+                result.append(line[start:cut].strip())
+                start = cut
+            result.append(line[start:].strip())
+        return result
+
+    @classmethod
+    def _cut_before_phone(cls, line: str, phone_start: int) -> int:
+        """Cut position before a phone, keeping up to two capitalised name words with it."""
+        # Only the last two words matter; looking at a bounded window keeps
+        # lines with many phones linear
+        window_start = max(0, phone_start - cls.NAME_WINDOW)
+        prefix = line[window_start:phone_start].rstrip()
+        words = prefix.split(' ')
+        if window_start > 0:
+            words = words[1:]  # may be a partial word
+
+        cut = phone_start
+        position = window_start + len(prefix)
+        for word in reversed(words[-2:]):
+            if not word or not word[0].isupper() or not cls.NAME_WORD_PATTERN.match(word):
+                break
+            position -= len(word)
+            cut = position
+            position -= 1  # the separating space
+        return cut
+
+    @classmethod
+    def _features(cls, lines: List[str]) -> List[LineFeatures]:
+        features = []
+        for line in lines:
+            stripped = line.strip()
+            phones = len(cls.PHONE_PATTERN.findall(stripped))
+            is_address = bool(cls.ADDRESS_PATTERN.search(stripped))
+            is_item = bool(cls.ITEM_PATTERN.search(stripped))
+            features.append(LineFeatures(
+                stripped,
+                phones,
+                cls.is_name_like(stripped, is_address, is_item),
+                is_address,
+                is_item,
+            ))
+        return features
+
+    @classmethod
+    def is_name_like(cls, line: str, is_address: bool, is_item: bool) -> bool:
+        """True if a line looks like a customer name: a "name" label, or one to three plain words."""
+        if not line or is_item:
+            return False
+        if cls.NAME_KEYWORD_PATTERN.match(line):
+            return True
+        if is_address:
+            return False
+
+        words = line.rstrip(':,').split()
+        if not 1 <= len(words) <= 3:
+            return False
+        if any(word.lower() in cls.FILLER_WORDS for word in words):
+            return False
+        return all(cls.NAME_WORD_PATTERN.match(word) for word in words)
+
+    @classmethod
+    def _boundary(cls, lines: List[LineFeatures], previous: int, current: int, header_lines: int) -> int:
+        """Index of the first line of the order that owns the phone at `current`."""
+        between = range(previous + 1, current)
+
+        blanks = [i for i in between if lines[i].is_blank]
+        if blanks:
+            return blanks[-1] + 1
+
+        start = current
+        while (
+            start - 1 > previous
+            and current - start < header_lines
+            and lines[start - 1].is_header
+        ):
+            start -= 1
+        return start
+
+    @classmethod
+    def _split_paragraphs(cls, lines: List[LineFeatures]) -> List[str]:
+        """Group blank-line separated paragraphs, merging ones with no order content."""
+        paragraphs: List[List[LineFeatures]] = [[]]
+        for line in lines:
+            if line.is_blank:
+                if paragraphs[-1]:
+                    paragraphs.append([])
+            else:
+                paragraphs[-1].append(line)
+        if not paragraphs[-1]:
+            paragraphs.pop()
+
+        blocks: List[List[LineFeatures]] = []
+        pending: List[LineFeatures] = []
+        for paragraph in paragraphs:
+            if any(line.is_order_content for line in paragraph):
+                blocks.append(pending + paragraph)
+                pending = []
+            else:
+                # Greeting or bare name: attach to the next order
+                pending.extend(paragraph)
+
+        if pending:
+            if blocks:
+                blocks[-1].extend(pending)
+            else:
+                blocks.append(pending)
+
+        return ["\n".join(line.text for line in block) for block in blocks]
+
+
+def build_splitter() -> type:
+    """Block splitter selected by config.SEGMENTER ("context" or "phone")."""
+    if config.SEGMENTER == "phone":
+        return BatchSplitter
+    return Segmenter
@@ -0,0 +1,57 @@
+import hashlib
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+def fingerprint(block: str) -> str:
+    """Stable fingerprint of a cleaned text block."""
+    return hashlib.sha256(block.encode('utf-8')).hexdigest()[:16]
+
+
+class SessionStore:
+    """
+    Per-paste block results, kept so a resubmission only reprocesses
+    the blocks whose cleaned text changed.
+
+    Sessions map block fingerprints to processing results. The store is
+    bounded (least recently used sessions are evicted first) and
+    sessions expire after ttl_seconds.
+    """
+
+    def __init__(self, max_sessions: int, ttl_seconds: float, clock: Callable[[], float] = time.monotonic):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        # token -> (last_used, {fingerprint: result})
+        self._sessions: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+
+    def get(self, token: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Block results for a session, or None if the token is unknown or expired."""
+        if not token:
+            return None
+        with self._lock:
+            entry = self._sessions.get(token)
+            if entry is None:
+                return None
+            last_used, results = entry
+            if self._clock() - last_used > self.ttl_seconds:
+                del self._sessions[token]
+                return None
+            return results
+
+    def save(self, token: Optional[str], results: Dict[str, Any]) -> str:
+        """Store block results under token (a new one if not given) and return the token."""
+        token = token or secrets.token_urlsafe(16)
+        with self._lock:
+            self._sessions[token] = (self._clock(), results)
+            self._sessions.move_to_end(token)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        return token
+
+    def __len__(self) -> int:
+        return len(self._sessions)
@@ -0,0 +1,251 @@
+import json
+import os
+import queue
+import secrets
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional
+
+from config import config
+
+
+SERVICE_NAME = "ai-text-processor"
+SCOPE_NAME = "shorol-order.pipeline"
+
+# OTLP status codes
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    """Encode an attribute value as an OTLP AnyValue."""
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    if isinstance(value, (list, tuple)):
+        return {"arrayValue": {"values": [_otlp_value(item) for item in value]}}
+    return {"stringValue": str(value)}
+
+
+class Span:
+    """One timed operation in a trace."""
+
+    __slots__ = (
+        "name", "trace_id", "span_id", "parent_span_id",
+        "start_ns", "end_ns", "attributes", "status_code", "status_message",
+    )
+
+    def __init__(self, name: str, trace_id: str, parent_span_id: Optional[str], attributes: Dict[str, Any]):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_span_id = parent_span_id
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes = attributes
+        self.status_code = STATUS_OK
+        self.status_message = ""
+
+    @property
+    def duration(self) -> float:
+        """Duration in seconds (so far, if still open)."""
+        end_ns = self.end_ns if self.end_ns is not None else time.time_ns()
+        return (end_ns - self.start_ns) / 1e9
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def set_error(self, message: str) -> None:
+        self.status_code = STATUS_ERROR
+        self.status_message = message
+
+    def to_otlp(self) -> Dict[str, Any]:
+        """Encode as an OTLP/JSON span."""
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_span_id or "",
+            "name": self.name,
+            "kind": 1,  # SPAN_KIND_INTERNAL
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns or self.start_ns),
+            "attributes": [
+                {"key": key, "value": _otlp_value(value)}
+                for key, value in self.attributes.items()
+                if value is not None
+            ],
+            "status": {"code": self.status_code, "message": self.status_message},
+        }
+
+
+class _NoopSpan:
+    """Stand-in when tracing is disabled."""
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def set_error(self, message: str) -> None:
+        pass
+
+
+def otlp_payload(spans: List[Span]) -> Dict[str, Any]:
+    """Wrap spans in an OTLP ExportTraceServiceRequest (JSON encoding)."""
+    return {
+        "resourceSpans": [
+            {
+                "resource": {
+                    "attributes": [{"key": "service.name", "value": {"stringValue": SERVICE_NAME}}],
+                },
+                "scopeSpans": [
+                    {
+                        "scope": {"name": SCOPE_NAME},
+                        "spans": [span.to_otlp() for span in spans],
+                    }
+                ],
+            }
+        ]
+    }
+
+
+class FileExporter:
+    """Append one OTLP/JSON payload per trace to a file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    def export(self, spans: List[Span]) -> None:
+        line = json.dumps(otlp_payload(spans), ensure_ascii=False) + "\n"
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line)
+
+
+class OTLPHttpExporter:
+    """Send traces to an OTLP/HTTP collector from a background thread."""
+
+    def __init__(self, endpoint: str, max_pending: int = 1000):
+        self.endpoint = endpoint
+        self.dropped = 0
+        self._queue: "queue.Queue[List[Span]]" = queue.Queue(maxsize=max_pending)
+        self._thread = threading.Thread(target=self._run, name="otlp-exporter", daemon=True)
+        self._thread.start()
+
+    def export(self, spans: List[Span]) -> None:
+        try:
+            self._queue.put_nowait(spans)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self) -> None:
+        while True:
+            spans = self._queue.get()
+            body = json.dumps(otlp_payload(spans)).encode('utf-8')
+            request = urllib.request.Request(
+                self.endpoint,
+                data=body,
+                headers={"Content-Type": "application/json"},
+                method="POST",
+            )
+            try:
+                urllib.request.urlopen(request, timeout=5).close()
+            except Exception:
+                self.dropped += 1
+
+
+class Tracer:
+    """
+    Minimal OpenTelemetry-compatible tracer.
+
+    Spans are collected per trace and handed to the exporter when the
+    root span ends. Traces slower than slow_threshold are also written
+    in full to the slow-request log.
+    """
+
+    def __init__(
+        self,
+        exporter: Any = None,
+        slow_threshold: float = 0.0,
+        slow_log_path: Optional[str] = None,
+    ):
+        self.exporter = exporter
+        self.slow_threshold = slow_threshold
+        self.slow_log = FileExporter(slow_log_path) if slow_threshold > 0 and slow_log_path else None
+        self.slow_count = 0
+
+        self._current: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+        self._traces: Dict[str, List[Span]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None or self.slow_log is not None
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[Any]:
+        """
+        Open a span as a child of the current one (or a new root).
+
+        Exceptions mark the span as failed and are re-raised.
+        """
+        if not self.enabled:
+            yield _NoopSpan()
+            return
+
+        parent = self._current.get()
+        trace_id = parent.trace_id if parent is not None else secrets.token_hex(16)
+        span = Span(name, trace_id, parent.span_id if parent is not None else None, attributes)
+
+        with self._lock:
+            self._traces.setdefault(trace_id, []).append(span)
+
+        token = self._current.set(span)
+        try:
+            yield span
+        except Exception as e:
+            span.set_error(str(e))
+            raise
+        finally:
+            span.end_ns = time.time_ns()
+            self._current.reset(token)
+            if parent is None:
+                self._finish_trace(span)
+
+    def _finish_trace(self, root: Span) -> None:
+        """Export a completed trace and sample it to the slow log if needed."""
+        with self._lock:
+            spans = self._traces.pop(root.trace_id, [])
+
+        if self.exporter is not None:
+            self.exporter.export(spans)
+
+        if self.slow_log is not None and root.duration >= self.slow_threshold:
+            self.slow_count += 1
+            self.slow_log.export(spans)
+
+
+def build_tracer() -> Tracer:
+    """Create the tracer configured by TRACE_* settings."""
+    exporter = None
+    if config.TRACE_EXPORTER == "file":
+        exporter = FileExporter(config.TRACE_FILE_PATH)
+    elif config.TRACE_EXPORTER == "otlp":
+        exporter = OTLPHttpExporter(config.TRACE_OTLP_ENDPOINT)
+
+    return Tracer(
+        exporter=exporter,
+        slow_threshold=config.SLOW_REQUEST_SECONDS,
+        slow_log_path=config.SLOW_REQUEST_LOG_PATH,
+    )
+
+
+# Singleton instance
+tracer = build_tracer()
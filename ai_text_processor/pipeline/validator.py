@@ -5,6 +5,8 @@ from typing import Dict, List, Any
 class ValidationResult:
     """Result of validation."""
     
+    __slots__ = ("is_valid", "errors")
+    
     def __init__(self, is_valid: bool, errors: List[str] = None):
         self.is_valid = is_valid
         self.errors = errors or []
@@ -0,0 +1,129 @@
+"""Fast JSON encoding and negotiated response compression for the API."""
+
+import gzip
+import json
+from typing import Any, List, Optional, Tuple
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional encoding
+    brotli = None
+
+
+def encode_json(content: Any) -> bytes:
+    """Encode to compact UTF-8 JSON, with orjson when it is installed."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+        except orjson.JSONEncodeError:
+            # orjson rejects what the stdlib accepts, e.g. integers over 64 bits
+            # (quantities are read from user text)
+            pass
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode('utf-8')
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse that renders with encode_json."""
+
+    def render(self, content: Any) -> bytes:
+        return encode_json(content)
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """Pick "br" or "gzip" from an Accept-Encoding header, or None."""
+    accepted = set()
+    for token in accept_encoding.lower().split(','):
+        name, _, params = token.strip().partition(';')
+        if params.replace(' ', '') in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            continue
+        accepted.add(name.strip())
+
+    if brotli is not None and 'br' in accepted:
+        return 'br'
+    if 'gzip' in accepted or '*' in accepted:
+        return 'gzip'
+    return None
+
+
+def compress(body: bytes, encoding: str, gzip_level: int = 6, brotli_quality: int = 4) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(body, quality=brotli_quality)
+    return gzip.compress(body, compresslevel=gzip_level)
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware that compresses large responses with brotli or gzip,
+    whichever the client accepts (brotli preferred when installed).
+    """
+
+    def __init__(self, app, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept_encoding = ""
+        for key, value in scope.get("headers", []):
+            if key == b"accept-encoding":
+                accept_encoding = value.decode('latin-1')
+                break
+
+        encoding = choose_encoding(accept_encoding)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        chunks: List[bytes] = []
+
+        async def buffered_send(message):
+            nonlocal start_message
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            chunks.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+
+            body = b"".join(chunks)
+            headers = list(start_message.get("headers", []))
+            already_encoded = any(key == b"content-encoding" for key, _ in headers)
+
+            if not already_encoded and len(body) >= self.minimum_size:
+                body = compress(body, encoding, self.gzip_level, self.brotli_quality)
+                headers = [(key, value) for key, value in headers if key != b"content-length"]
+                headers += [
+                    (b"content-encoding", encoding.encode('latin-1')),
+                    (b"content-length", str(len(body)).encode('latin-1')),
+                    (b"vary", b"Accept-Encoding"),
+                ]
+
+            await send({**start_message, "headers": headers})
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, buffered_send)
+
+
+def encoded_sizes(body: bytes) -> List[Tuple[str, int]]:
+    """Bytes on the wire for each supported encoding (for benchmarks)."""
+    sizes = [("identity", len(body)), ("gzip", len(compress(body, "gzip")))]
+    if brotli is not None:
+        sizes.append(("br", len(compress(body, "br"))))
+    return sizes
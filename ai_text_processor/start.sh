@@ -17,10 +17,10 @@ if [ ! -f "app.py" ]; then
     exit 1
 fi
 
-# Install dependencies if needed
-if ! python3 -c "import fastapi" &> /dev/null; then
+# Install dependencies if needed (pytest and hypothesis run the test suite)
+if ! python3 -c "import fastapi, pytest, hypothesis" &> /dev/null; then
     echo "📦 Installing dependencies..."
-    pip install -r requirements.txt
+    pip install -r requirements-dev.txt
     echo ""
 fi
 
@@ -39,7 +39,7 @@ if [ ! -f "test_pipeline.py" ]; then
     exit 1
 fi
 
-python3 test_pipeline.py
+python3 -m pytest -q test_pipeline.py
 if [ $? -ne 0 ]; then
     echo "❌ Tests failed"
     exit 1
@@ -2,11 +2,53 @@
 """
 Quick test script for the AI Text Processor.
 Runs basic validation tests without requiring OpenAI API key.
+
+Run with pytest (see requirements-dev.txt):
+    python -m pytest -q test_pipeline.py
+Running this file directly does the same.
 """
 
 import sys
 sys.path.insert(0, '.')
 
+import pytest
+
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    """
+    Install a fake OpenAI client, behind a fresh circuit breaker.
+
+    Call the fixture with reply(messages, **params) -> content; see
+    pipeline.fake_llm.fake_client.
+    """
+    from pipeline.circuit_breaker import CircuitBreaker
+    from pipeline.fake_llm import fake_client
+    from pipeline.llm import llm
+
+    def install(reply):
+        monkeypatch.setattr(llm, "breaker", CircuitBreaker())
+        monkeypatch.setattr(llm, "client", fake_client(reply))
+
+    return install
+
+
+def phone_reply(messages, **params):
+    """Fake LLM reply with one order per message, holding the message's phone; handles batch prompts."""
+    import json
+    import re
+
+    user = messages[-1]["content"]
+    if "Batch mode" not in messages[0]["content"]:
+        return json.dumps({"orders": [{"phone": re.search(r"01\d{9}", user).group(0)}]})
+    parts = re.findall(r'Message (\d+):\n"""\n(.*?)\n"""', user, re.S)
+    # Out of order, so results must be matched by id
+    return json.dumps({"results": [
+        {"id": int(i), "orders": [{"phone": re.search(r"01\d{9}", block).group(0)}]}
+        for i, block in reversed(parts)
+    ]})
+
+
 def test_pipeline():
     """Test the full processing pipeline."""
     from pipeline.processor import processor
@@ -29,45 +71,797 @@ def test_pipeline():
         }
     ]
     
-    print("🧪 Testing AI Text Processor Pipeline\n")
-    print("=" * 60)
-    
-    passed = 0
-    failed = 0
-    
-    for i, test in enumerate(test_cases, 1):
-        print(f"\nTest {i}: {test['name']}")
-        print("-" * 60)
-        
+    for test in test_cases:
+        result = processor.process_text(test['input'])
+        assert result['blocks_processed'] == test['expected_blocks'], test['name']
+        assert result['results']['orders'], test['name']
+
+
+def test_admission_fair_queuing():
+    """Waiting clients are admitted round-robin, and overload is shed."""
+    import asyncio
+    from pipeline.admission import AdmissionController, AdmissionRejected
+
+    async def scenario():
+        controller = AdmissionController(
+            max_active=1, max_queue_depth=8, max_queued_per_client=3,
+            queue_timeout=5, retry_after=1,
+        )
+        admitted = []
+
+        async def request(client_id, tag):
+            await controller.acquire(client_id)
+            admitted.append(tag)
+
+        await controller.acquire("busy")
+        tasks = [asyncio.create_task(request("a", f"a{i}")) for i in range(3)]
+        await asyncio.sleep(0)
+        tasks.append(asyncio.create_task(request("b", "b0")))
+        await asyncio.sleep(0)
+
         try:
-            result = processor.process_text(test['input'])
-            
-            blocks_ok = result['blocks_processed'] == test['expected_blocks']
-            has_orders = len(result['results']['orders']) > 0
-            
-            if blocks_ok and has_orders:
-                print(f"✅ PASSED")
-                print(f"   Blocks: {result['blocks_processed']}/{test['expected_blocks']}")
-                print(f"   Orders: {len(result['results']['orders'])}")
-                print(f"   Time: {result['processing_time']}")
-                passed += 1
-            else:
-                print(f"❌ FAILED")
-                print(f"   Blocks: {result['blocks_processed']}/{test['expected_blocks']}")
-                print(f"   Orders: {len(result['results']['orders'])}")
-                failed += 1
-                
-        except Exception as e:
-            print(f"❌ ERROR: {str(e)}")
-            failed += 1
-    
-    print("\n" + "=" * 60)
-    print(f"\n📊 Results: {passed} passed, {failed} failed")
-    print("\n✨ All systems operational!" if failed == 0 else "\n⚠️  Some tests failed")
-    
-    return failed == 0
+            await controller.acquire("a")
+            assert False, "client over its share should be rejected"
+        except AdmissionRejected as e:
+            assert e.status_code == 429
+
+        for _ in range(4):
+            controller.release()
+            await asyncio.sleep(0)
+        await asyncio.gather(*tasks)
+
+        assert admitted == ["a0", "b0", "a1", "a2"]
+        assert controller.stats()["queue_depth"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_admission_timeout_race():
+    """A release that lands while waiters are timing out frees the slot exactly once."""
+    import asyncio
+    from pipeline.admission import AdmissionController, AdmissionRejected
+
+    async def scenario():
+        controller = AdmissionController(
+            max_active=1, max_queue_depth=8, max_queued_per_client=3,
+            queue_timeout=0.05, retry_after=1,
+        )
+        await controller.acquire("busy")
+
+        async def request(client_id):
+            try:
+                await controller.acquire(client_id)
+                return True
+            except AdmissionRejected as e:
+                assert e.reason == "queue_timeout"
+                return False
+
+        tasks = [asyncio.create_task(request(client_id)) for client_id in ("a", "b")]
+        await asyncio.sleep(0)
+        # Fires after both timeouts, while wait_for is still cancelling the waiters
+        loop = asyncio.get_running_loop()
+        loop.call_later(controller.queue_timeout, loop.call_soon, controller.release)
+        for admitted in await asyncio.gather(*tasks):
+            if admitted:
+                controller.release()
+
+        assert controller.stats()["active"] == 0
+        assert controller.stats()["queue_depth"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_admission_http_limits():
+    """Oversized input is rejected fast and counted."""
+    from fastapi.testclient import TestClient
+    from app import app
+    from config import config
+
+    client = TestClient(app)
+    response = client.post("/process-text", json={"text": "x" * (config.MAX_INPUT_BYTES + 1)})
+    assert response.status_code == 413
+
+    metrics = client.get("/metrics").json()
+    assert metrics["admission"]["shed"]["input_too_large"] >= 1
+    assert metrics["admission"]["queue_depth"] == 0
+
+
+def test_body_limit_before_parsing(monkeypatch):
+    """Bodies over the raw limit get 413 from Content-Length or while streaming, before parsing."""
+    import json
+    from fastapi.testclient import TestClient
+    from app import app
+    from config import config
+    from pipeline.processor import processor
+
+    def never(*args, **kwargs):
+        raise AssertionError("oversized body must not reach the processor")
+
+    monkeypatch.setattr(config, "MAX_BODY_BYTES", 1000)
+    monkeypatch.setattr(processor, "process_text", never)
+    client = TestClient(app)
+    body = json.dumps({"text": "x" * 2000}).encode()
+
+    response = client.post("/process-text", content=body, headers={"Content-Type": "application/json"})
+    assert response.status_code == 413
+    assert "byte limit" in response.json()["error"]
+
+    chunks = iter([body[:600], body[600:1200], body[1200:]])
+    response = client.post("/process-text", content=chunks, headers={"Content-Type": "application/json"})
+    assert response.status_code == 413
+
+    assert client.get("/metrics").json()["admission"]["shed"]["body_too_large"] >= 2
+
+
+def test_client_id_ignores_header_by_default(monkeypatch):
+    """Fair queuing keys on the peer address unless the X-Client-ID header is trusted."""
+    from types import SimpleNamespace
+    from app import _client_id
+    from config import config
+
+    request = SimpleNamespace(headers={"x-client-id": "spoofed"}, client=SimpleNamespace(host="10.0.0.7"))
+    assert _client_id(request) == "10.0.0.7"
+
+    monkeypatch.setattr(config, "TRUST_CLIENT_ID_HEADER", True)
+    assert _client_id(request) == "spoofed"
+
+
+def test_process_texts_batch():
+    """Batch results come back per message id; one bad message does not fail the batch."""
+    from pipeline.processor import processor
+
+    result = processor.process_texts(
+        [
+            ("m1", "Rahim 01711234567\nDhaka"),
+            ("m2", "Rahim 01711234567\nDhaka"),
+            ("m3", "x" * 100),
+            ("m4", "Karim 01812345678\nChittagong"),
+        ],
+        max_bytes=50,
+    )
+
+    ids = [item["id"] for item in result["results"]]
+    assert ids == ["m1", "m2", "m3", "m4"]
+    assert "error" in result["results"][2]
+    assert result["results"][0]["result"]["results"]["orders"]
+    assert result["results"][3]["result"]["results"]["orders"][0]["phone"] == "01812345678"
+    assert result["blocks_processed"] == 3
+    assert result["unique_blocks"] == 2
+
+
+def test_llm_calls_are_counted(monkeypatch, fake_llm):
+    """llm_calls reports calls actually sent: none in mock mode, shared blocks once, a batch once."""
+    from pipeline.batcher import MicroBatcher
+    from pipeline.extractor import extractor
+    from pipeline.llm import llm
+    from pipeline.processor import TextProcessor
+
+    processor = TextProcessor()
+    texts = [
+        ("m1", "Rahim 01711111111\nMirpur\n\nKarim 01722222222\nUttara"),
+        ("m2", "Rahim 01711111111\nMirpur"),
+    ]
+
+    monkeypatch.setattr(llm, "client", None)
+    result = processor.process_texts(texts)
+    assert [item["result"]["llm_calls"] for item in result["results"]] == [0, 0]
+
+    calls = []
+
+    def reply(messages, **params):
+        calls.append(messages[-1]["content"])
+        return phone_reply(messages)
+
+    fake_llm(reply)
+    result = processor.process_texts(texts)
+    counts = [item["result"]["llm_calls"] for item in result["results"]]
+    assert len(calls) == 2
+    assert counts == [2, 0]
+
+    calls.clear()
+    monkeypatch.setattr(extractor, "batcher", MicroBatcher(extractor._extract_batch, window_seconds=0.2, max_batch_size=8))
+    result = processor.process_text("Jamal 01733333333\nBadda\n\nSumon 01744444444\nMirpur")
+    assert len(calls) == 1
+    assert result["llm_calls"] == 1
+
+
+def test_process_texts_block_cap():
+    """A batch over MAX_BLOCKS_PER_BATCH is rejected as a whole; the response matches its model."""
+    from fastapi.testclient import TestClient
+    from app import ProcessTextsResponse, app
+    from config import config
+
+    client = TestClient(app)
+    message = {"id": "m", "text": "Rahim 01711234567\nDhaka"}
+
+    response = client.post("/process-texts", json={"messages": [message]})
+    assert response.status_code == 200
+    ProcessTextsResponse.model_validate(response.json())
+
+    too_many = [dict(message, id=f"m{i}", text=f"Rahim 017{i:08d}\nDhaka") for i in range(config.MAX_BLOCKS_PER_BATCH + 1)]
+    response = client.post("/process-texts", json={"messages": too_many})
+    assert response.status_code == 413
+
+
+def test_cli_resume(tmp_path):
+    """An interrupted CLI run resumes from its checkpoint without duplicating rows."""
+    import json
+    import cli
+
+    input_path = tmp_path / "in.jsonl"
+    output_path = tmp_path / "out.jsonl"
+    input_path.write_text(
+        "\n".join(json.dumps({"id": i, "text": f"Rahim 0171123456{i}"}) for i in range(5)),
+        encoding="utf-8",
+    )
+
+    assert cli.main([str(input_path), "-o", str(output_path), "--workers", "0", "--chunk-size", "2"]) == 0
+    complete = output_path.read_bytes()
+
+    # Simulate a crash after the first chunk, with a half-written second chunk
+    first_chunk = b"".join(complete.splitlines(keepends=True)[:2])
+    input_offset = len(b"".join(input_path.read_bytes().splitlines(keepends=True)[:2]))
+    output_path.write_bytes(first_chunk + b'{"line": 2, "id"')
+    cli.Checkpoint(str(output_path) + ".checkpoint").save(2, len(first_chunk), input_offset)
+    # Resume seeks past the finished records, so it never reads them again
+    original_input = input_path.read_bytes()
+    input_path.write_bytes(b"x" * (input_offset - 1) + b"\n" + original_input[input_offset:])
+
+    assert cli.main([str(input_path), "-o", str(output_path), "--workers", "0", "--resume"]) == 0
+    rows = [json.loads(line) for line in output_path.read_text(encoding="utf-8").splitlines()]
+    assert [row["id"] for row in rows] == [0, 1, 2, 3, 4]
+    assert not any("error" in row for row in rows)
+    input_path.write_bytes(original_input)
+
+    # A checkpoint from before input offsets were stored skips records by count
+    output_path.write_bytes(first_chunk)
+    (tmp_path / "out.jsonl.checkpoint").write_text(json.dumps({"records_done": 2, "output_offset": len(first_chunk)}))
+    assert cli.main([str(input_path), "-o", str(output_path), "--workers", "0", "--resume"]) == 0
+    rows = [json.loads(line) for line in output_path.read_text(encoding="utf-8").splitlines()]
+    assert [row["id"] for row in rows] == [0, 1, 2, 3, 4]
+
+    # A checkpoint without its output file starts over instead of padding with NUL bytes
+    output_path.unlink()
+    cli.Checkpoint(str(output_path) + ".checkpoint").save(2, len(first_chunk), input_offset)
+    assert cli.main([str(input_path), "-o", str(output_path), "--workers", "0", "--resume"]) == 0
+    assert b"\x00" not in output_path.read_bytes()
+    rows = [json.loads(line) for line in output_path.read_text(encoding="utf-8").splitlines()]
+    assert [row["id"] for row in rows] == [0, 1, 2, 3, 4]
+
+
+def test_cli_bad_records(tmp_path):
+    """Records with a non-string text become error rows; the run continues."""
+    import json
+    import cli
+
+    input_path = tmp_path / "in.jsonl"
+    output_path = tmp_path / "out.jsonl"
+    input_path.write_text(
+        "\n".join(json.dumps(record) for record in [
+            {"id": 1, "text": "Rahim 01711234567"},
+            {"id": 2, "text": 123},
+            {"id": 3, "text": "Karim 01812345678"},
+        ]),
+        encoding="utf-8",
+    )
+
+    assert cli.main([str(input_path), "-o", str(output_path), "--workers", "1"]) == 0
+    rows = [json.loads(line) for line in output_path.read_text(encoding="utf-8").splitlines()]
+    assert [row["id"] for row in rows] == [1, 2, 3]
+    assert "error" in rows[1] and "result" in rows[0] and "result" in rows[2]
+    assert cli.prepare_record((0, (4, {"not": "text"})))[3] is not None
+
+
+def test_cassette_record_replay(tmp_path):
+    """Recorded LLM calls replay offline in order, including failures."""
+    from pipeline.cassette import Cassette, CassetteMiss, RecordedError
+    from pipeline.fake_llm import fake_client
+    from pipeline.llm import LLMClient
+
+    replies = iter(['{"orders": []}', RuntimeError("rate limited"), '{"orders": [{"phone": "01711234567"}]}'])
+
+    def reply(messages, **params):
+        content = next(replies)
+        if isinstance(content, Exception):
+            raise content
+        return content
+
+    path = str(tmp_path / "llm.jsonl.gz")
+    messages = [{"role": "user", "content": "Rahim 01711234567"}]
+
+    recorder = LLMClient()
+    recorder.client = fake_client(reply)
+    recorder.cassette = Cassette(path, Cassette.RECORD)
+    assert recorder.complete("extract", messages) == '{"orders": []}'
+    try:
+        recorder.complete("correct", messages)
+    except RuntimeError:
+        pass
+    recorder.complete("correct", messages)
+
+    player = LLMClient()
+    player.client = None
+    player.cassette = Cassette(path, Cassette.REPLAY)
+    assert player.available
+    assert len(player.cassette) == 3
+    assert player.complete("extract", messages) == '{"orders": []}'
+    try:
+        player.complete("correct", messages)
+        assert False, "recorded failure should be replayed"
+    except RecordedError as e:
+        assert "rate limited" in str(e)
+    assert "01711234567" in player.complete("correct", messages)
+
+    try:
+        player.complete("extract", [{"role": "user", "content": "unseen"}])
+        assert False, "unknown prompt should miss"
+    except CassetteMiss:
+        pass
+    assert player.breaker.stats()["window_failures"] == 0
+
+
+def test_tracing_spans(tmp_path, monkeypatch):
+    """A request produces one trace with nested stage spans; slow traces are logged."""
+    import json
+    import pipeline.processor as processor_module
+    from pipeline.tracing import FileExporter, Tracer
+
+    trace_path = tmp_path / "traces.jsonl"
+    slow_path = tmp_path / "slow.jsonl"
+    test_tracer = Tracer(FileExporter(str(trace_path)), slow_threshold=1e-9, slow_log_path=str(slow_path))
+    monkeypatch.setattr(processor_module, "tracer", test_tracer)
+
+    processor_module.processor.process_text("Rahim 01711234567\nDhaka\n\nKarim 01812345678\nChittagong")
+
+    payload = json.loads(trace_path.read_text(encoding="utf-8"))
+    spans = payload["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    by_id = {span["spanId"]: span for span in spans}
+    names = [span["name"] for span in spans]
+
+    assert len({span["traceId"] for span in spans}) == 1
+    assert names.count("block") == 2
+    for name in ("process_text", "clean", "split", "extract", "validate"):
+        assert name in names
+    root = next(span for span in spans if span["name"] == "process_text")
+    assert root["parentSpanId"] == ""
+    for span in spans:
+        if span["name"] == "block":
+            assert by_id[span["parentSpanId"]]["name"] == "process_text"
+
+    assert test_tracer.slow_count == 1
+    assert slow_path.read_text(encoding="utf-8").count("\n") == 1
+
+
+def test_segmenter_corpus():
+    """The context segmenter needs fewer LLM calls per order than phone splitting."""
+    from benchmarks.segmentation import evaluate, load_corpus
+    from pipeline.batch_splitter import BatchSplitter
+    from pipeline.segmenter import Segmenter
+
+    corpus = load_corpus()
+    phone = evaluate(BatchSplitter, corpus)
+    context = evaluate(Segmenter, corpus)
+
+    assert context["extracted_orders"] == context["expected_orders"]
+    assert context["empty_blocks"] == 0
+    assert context["llm_calls_per_order"] < phone["llm_calls_per_order"]
+
+
+def test_circuit_breaker_states():
+    """The breaker opens on failures, probes after the cool-down and closes on success."""
+    from pipeline.circuit_breaker import CircuitBreaker, CircuitOpenError
+
+    now = [0.0]
+    breaker = CircuitBreaker(window_size=4, min_calls=4, failure_rate=0.5, open_seconds=30, clock=lambda: now[0])
+
+    for success in (True, False, True, False):
+        breaker.before_call()
+        breaker.record(success, 0.1)
+    assert breaker.state == CircuitBreaker.OPEN
+
+    try:
+        breaker.before_call()
+        assert False, "open breaker should reject calls"
+    except CircuitOpenError:
+        pass
+
+    now[0] = 31.0
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    breaker.before_call()
+    try:
+        breaker.before_call()
+        assert False, "only one probe at a time"
+    except CircuitOpenError:
+        pass
+    breaker.record(True, 0.1)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_breaker_counts_only_backend_failures(monkeypatch):
+    """4xx errors and cassette misses leave the breaker closed; timeouts open it; queueing is not latency."""
+    import time
+    from contextlib import contextmanager
+    from types import SimpleNamespace
+    import httpx
+    import openai
+    from pipeline import llm as llm_module
+    from pipeline.circuit_breaker import CircuitBreaker
+    from pipeline.fake_llm import fake_client
+    from pipeline.llm import LLMClient
+
+    request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+    errors = []
+
+    def fail(messages, **params):
+        raise errors.pop(0)
+
+    client = LLMClient()
+    client.client = fake_client(fail)
+    client.breaker = CircuitBreaker(window_size=4, min_calls=4, failure_rate=0.5, slow_call_seconds=0.1, slow_call_rate=0.5)
+
+    errors.extend(
+        openai.BadRequestError("context length exceeded", response=httpx.Response(400, request=request), body=None)
+        for _ in range(4)
+    )
+    for _ in range(4):
+        try:
+            client.complete("extract", [{"role": "user", "content": "x" * 100}])
+        except openai.BadRequestError:
+            pass
+    assert client.breaker.state == CircuitBreaker.CLOSED
+    assert client.breaker.stats()["window_failures"] == 0
+
+    errors.extend([
+        openai.APITimeoutError(request=request),
+        openai.InternalServerError("bad gateway", response=httpx.Response(502, request=request), body=None),
+    ])
+    for _ in range(2):
+        try:
+            client.complete("extract", [{"role": "user", "content": "x"}])
+        except openai.APIError:
+            pass
+    assert client.breaker.state == CircuitBreaker.OPEN
+
+    @contextmanager
+    def busy_slot():
+        time.sleep(0.2)
+        yield
+
+    client.breaker = CircuitBreaker(min_calls=1, slow_call_seconds=0.1, slow_call_rate=1.0)
+    client.client = fake_client(lambda messages, **params: "{}")
+    monkeypatch.setattr(llm_module, "llm_limiter", SimpleNamespace(slot=busy_slot))
+    client.complete("extract", [{"role": "user", "content": "x"}])
+    assert client.breaker.stats()["window_slow_calls"] == 0
+
+
+def test_degraded_mode(monkeypatch, fake_llm):
+    """With the circuit open, blocks are answered from rules without calling the LLM."""
+    from pipeline.circuit_breaker import CircuitBreaker
+    from pipeline.llm import llm
+    from pipeline.processor import processor
+
+    def fail(messages, **params):
+        raise AssertionError("LLM must not be called while the circuit is open")
+
+    fake_llm(fail)
+    breaker = CircuitBreaker(min_calls=1)
+    breaker.before_call()
+    breaker.record(False, 0.0)
+    monkeypatch.setattr(llm, "breaker", breaker)
+
+    result = processor.process_text("Rahim\nMirpur 10\n01711234567\nshirt 2pc")
+
+    assert result["degraded"] is True
+    assert result["needs_review"] is True
+    assert result["retry_count"] == 0
+    order = result["results"]["orders"][0]
+    assert order["phone"] == "01711234567"
+    assert order["customer_name"] == "Rahim"
+    assert order["quantity"] == 2
+
+
+def test_compressed_response_matches_schema():
+    """Large responses are compressed as negotiated and still match ProcessTextResponse."""
+    from fastapi.testclient import TestClient
+    from app import ProcessTextResponse, app
+    from serialization import brotli
+
+    text = "\n\n".join(f"Customer {i}\n017{i:08d}\nMirpur 10\nshirt 2pc" for i in range(20))
+    client = TestClient(app)
+
+    response = client.post("/process-text", json={"text": text}, headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    ProcessTextResponse.model_validate(response.json())
+    assert len(response.json()["results"]["orders"]) == 20
+
+    if brotli is not None:
+        response = client.post("/process-text", json={"text": text}, headers={"Accept-Encoding": "gzip, br"})
+        assert response.headers["content-encoding"] == "br"
+        ProcessTextResponse.model_validate(response.json())
+
+    response = client.post("/process-text", json={"text": text}, headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in response.headers
+
+
+def test_response_with_huge_integer(fake_llm):
+    """A quantity beyond 64 bits still serializes; orjson falls back to the stdlib encoder."""
+    import json
+    from fastapi.testclient import TestClient
+    from app import app
+
+    order = {"customer_name": "Rahim", "phone": "01711234567", "address": "Mirpur",
+             "item": "shirt", "quantity": 99999999999999999999}
+    fake_llm(lambda messages, **params: json.dumps({"orders": [order]}))
+    client = TestClient(app)
+
+    response = client.post("/process-text", json={"text": "Rahim 01711234567\nMirpur\nshirt 99999999999999999999 pcs"})
+    assert response.status_code == 200
+    assert response.json()["results"]["orders"][0]["quantity"] == 99999999999999999999
+
+    response = client.post("/process-texts", json={"messages": [
+        {"id": "m1", "text": "Rahim 01711234567\nMirpur\nshirt 99999999999999999999 pcs"},
+    ]})
+    assert response.status_code == 200
+
+
+def test_incremental_resubmit(monkeypatch):
+    """A resubmit with the session token only reprocesses edited blocks, with indices realigned."""
+    from pipeline.processor import TextProcessor
+
+    processor = TextProcessor()
+    processed = []
+    original = processor._process_block
+    monkeypatch.setattr(processor, "_process_block", lambda block: processed.append(block) or original(block))
+
+    first = processor.process_text(
+        "Rahim\n01711234567\nMirpur\n\nKarim\n01812345678\nUttara\n\nJamal\n01911234567\nBadda"
+    )
+    assert len(processed) == 3
+    token = first["session"]["token"]
+
+    processed.clear()
+    # Fix a typo in the second order and drop the first one
+    second = processor.process_text(
+        "Karim\n01812345678\nUttara 7\n\nJamal\n01911234567\nBadda",
+        session_token=token,
+    )
+    assert processed == ["Karim\n01812345678\nUttara 7"]
+    assert second["session"]["token"] == token
+    assert second["session"]["reused_blocks"] == 1
+    assert [entry["block_index"] for entry in second["debug"]["final_validated_result"]] == [0, 1]
+    assert second["results"]["orders"][1]["phone"] == "01911234567"
+
+    processed.clear()
+    third = processor.process_text("Karim\n01812345678\nUttara 7", session_token="unknown")
+    assert len(processed) == 1
+    assert third["session"]["token"] != "unknown"
+
+
+def test_resubmit_reuses_only_valid_results(monkeypatch, fake_llm):
+    """Failed blocks are processed again on resubmit; reused blocks add no calls or retries."""
+    import json
+    from pipeline.processor import TextProcessor
+
+    order = {"customer_name": "Rahim", "phone": "01711234567", "address": "Mirpur", "item": "shirt", "quantity": 1}
+    fake_llm(lambda messages, **params: json.dumps({"orders": [order]}))
+
+    processor = TextProcessor()
+    text = "Rahim\n01711234567\nMirpur\nshirt"
+    attempts = []
+    original = processor._run_block_stages
+
+    def flaky(block):
+        attempts.append(block)
+        if len(attempts) == 1:
+            raise RuntimeError("LLM timed out")
+        result = original(block)
+        result.retry_count = 1
+        return result
+
+    monkeypatch.setattr(processor, "_run_block_stages", flaky)
+
+    first = processor.process_text(text)
+    assert first["needs_review"] is True
+    token = first["session"]["token"]
+
+    second = processor.process_text(text, session_token=token)
+    assert len(attempts) == 2
+    assert second["session"]["reused_blocks"] == 0
+    assert second["session"]["token"] == token
+    assert second["needs_review"] is False
+    assert (second["llm_calls"], second["retry_count"]) == (1, 1)
+
+    third = processor.process_text(text, session_token=token)
+    assert len(attempts) == 2
+    assert third["session"]["reused_blocks"] == 1
+    assert (third["llm_calls"], third["retry_count"]) == (0, 0)
+    assert third["results"] == second["results"]
+
+
+def test_lazy_imports_and_ready():
+    """Importing the app does not pull in openai; /ready turns 200 after warm-up."""
+    import subprocess
+    import time
+    from fastapi.testclient import TestClient
+    from app import app
+    from benchmarks.import_time import ROOT
+    from pipeline.processor import processor
+
+    output = subprocess.run(
+        [sys.executable, "-c", "import sys, app; print('openai' in sys.modules)"],
+        cwd=ROOT, check=True, capture_output=True, text=True,
+    ).stdout.strip()
+    assert output == "False"
+
+    with TestClient(app) as client:
+        deadline = time.time() + 10
+        while client.get("/ready").status_code != 200 and time.time() < deadline:
+            time.sleep(0.01)
+        assert client.get("/ready").json()["ready"] is True
+    assert processor.ready.is_set()
+
+
+def test_micro_batcher_routing():
+    """Concurrent submissions are grouped up to the size cap and each caller gets its own result."""
+    import threading
+    from pipeline.batcher import MicroBatcher
+
+    batches = []
+
+    def handler(items):
+        batches.append(list(items))
+        return [item * 10 for item in items]
+
+    batcher = MicroBatcher(handler, window_seconds=0.2, max_batch_size=4)
+    results = {}
+    threads = [
+        threading.Thread(target=lambda i=i: results.__setitem__(i, batcher.submit(i)))
+        for i in range(6)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == {i: i * 10 for i in range(6)}
+    assert sorted(len(batch) for batch in batches) == [2, 4]
+    stats = batcher.stats()
+    assert stats["batches"] == 2 and stats["items"] == 6 and stats["full_batches"] == 1
+
+
+def test_extract_batching(monkeypatch, fake_llm):
+    """Concurrent extractions share one LLM call; a bad batch reply falls back to per-block calls."""
+    import threading
+    from pipeline.batcher import MicroBatcher
+    from pipeline.extractor import extractor
+
+    calls = []
+    broken_batches = [False]
+    fallback_threads = set()
+
+    def reply(messages, **params):
+        calls.append(messages[-1]["content"])
+        if "Batch mode" not in messages[0]["content"]:
+            fallback_threads.add(threading.current_thread().name)
+        elif broken_batches[0]:
+            return "Sorry, here are the orders:"
+        return phone_reply(messages)
+
+    fake_llm(reply)
+    monkeypatch.setattr(extractor, "batcher", MicroBatcher(extractor._extract_batch, window_seconds=0.2, max_batch_size=8))
+
+    def extract_all(phones):
+        results = {}
+        threads = [
+            threading.Thread(target=lambda p=p: results.__setitem__(p, extractor.extract(f"Rahim {p}\nMirpur")))
+            for p in phones
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    phones = ["01711111111", "01722222222", "01733333333"]
+    results = extract_all(phones)
+    assert len(calls) == 1
+    assert {p: r["orders"][0]["phone"] for p, r in results.items()} == {p: p for p in phones}
+
+    calls.clear()
+    broken_batches[0] = True
+    results = extract_all(phones)
+    assert len(calls) == 1 + len(phones)
+    assert {p: r["orders"][0]["phone"] for p, r in results.items()} == {p: p for p in phones}
+    assert extractor.batcher.stats()["fallback_items"] == len(phones)
+    # Each caller makes its own fallback call, not the batch leader for all of them
+    assert len(fallback_threads) == len(phones)
+
+
+def test_extract_batch_truncated_reply(monkeypatch, fake_llm):
+    """A batch asks for an output budget that grows with its size; a cut-off reply leaves each block to its caller."""
+    from config import config
+    from pipeline.extractor import extractor
+
+    limits = []
+
+    def reply(messages, max_tokens, **params):
+        limits.append(max_tokens)
+        content = phone_reply(messages)
+        if "Batch mode" not in messages[0]["content"]:
+            return content
+        # Stopped at max_tokens in the middle of the array
+        return content[:len(content) // 2]
+
+    fake_llm(reply)
+    monkeypatch.setattr(config, "EXTRACT_BATCH_TOKENS_PER_BLOCK", 500)
+    monkeypatch.setattr(config, "EXTRACT_BATCH_MAX_TOKENS", 4096)
+
+    phones = [f"01{i}11111111" for i in range(3, 9)]
+    before = extractor.batcher.stats()["fallback_items"]
+    blocks = [f"Rahim {p}\nMirpur" for p in phones]
+    assert extractor._extract_batch(blocks) == [None] * len(phones)
+    assert extractor.batcher.stats()["fallback_items"] - before == len(phones)
+
+    # Callers handed None extract their block with a call of their own
+    results = [extractor.extract(block) for block in blocks]
+    assert limits[0] == 3000
+    assert limits[1:] == [config.MAX_TOKENS] * len(phones)
+    assert [r["orders"][0]["phone"] for r in results] == phones
+    assert extractor.batch_max_tokens(2) == config.MAX_TOKENS
+    assert extractor.batch_max_tokens(20) == 4096
+
+
+def test_fixer_copy_on_write():
+    """The fixer shares unchanged orders, returns the input when nothing changes and never mutates it."""
+    from pipeline.fixer import AutoFixer
+
+    clean = {"customer_name": "Rahim", "phone": "01711234567", "item": "shirt", "quantity": 1}
+    broken = {"customer_name": "Karim", "phone": "+8801812345678", "item": "shirt 2pc", "quantity": None}
+    data = {"orders": [clean, broken]}
+
+    fixed = AutoFixer.auto_fix(data)
+
+    assert fixed is not data
+    assert fixed["orders"][0] is clean
+    assert fixed["orders"][1] == {**broken, "phone": "01812345678", "quantity": 2}
+    assert broken["phone"] == "+8801812345678" and broken["quantity"] is None
+    assert AutoFixer.auto_fix(fixed) is fixed
+
+
+def test_pathological_inputs():
+    """Deterministic stages stay linear and within time/memory budgets on hostile input."""
+    import os
+    from benchmarks.pathological import run
+
+    scale = float(os.getenv("PERF_BUDGET_SCALE", "1"))
+    failures = [result for result in run(size=40_000, fuzz_cases=3, scale=scale) if result["failures"]]
+    assert not failures, "\n\n".join(
+        f"{result['input']} / {result['stage']}: {'; '.join(result['failures'])}\n{result['hotspots']}"
+        for result in failures
+    )
+
+
+def test_pathological_inputs_property():
+    """Property-based variant: arbitrary mixes of hostile fragments finish within the deadline."""
+    import pytest
+    hypothesis = pytest.importorskip("hypothesis")
+    from hypothesis import strategies as st
+    from benchmarks.pathological import FUZZ_FRAGMENTS, STAGES, stage_input
+
+    fragments = st.sampled_from(FUZZ_FRAGMENTS) | st.text(max_size=20)
+    texts = st.lists(
+        st.tuples(fragments, st.integers(min_value=1, max_value=500)), max_size=40,
+    ).map(lambda parts: "".join(fragment * count for fragment, count in parts))
+
+    @hypothesis.settings(deadline=500, max_examples=50)
+    @hypothesis.given(texts)
+    def check(text):
+        for stage, func in STAGES.items():
+            func(stage_input(stage, text))
+
+    check()
 
 
 if __name__ == '__main__':
-    success = test_pipeline()
-    sys.exit(0 if success else 1)
+    sys.exit(pytest.main([__file__, "-q"]))